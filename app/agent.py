@@ -1,26 +1,70 @@
-from typing import List
-from .models import OpportunityInput, DecisionOutput
+from typing import Callable, List, Optional, Tuple
+
+import pydantic_core
+
+from .models import OpportunityInput, DecisionOutput, ScoreBreakdown
 from .scoring import score_opportunity
+from .cache import EncodedDecision, decision_cache, opportunity_key
+from .metrics import metrics
+from .policy import Policy, get_policy
 
 
-def mock_decision(inp: OpportunityInput) -> DecisionOutput:
+def mock_decision(inp: OpportunityInput, policy: Optional[Policy] = None) -> DecisionOutput:
+    policy = policy or get_policy()
     # Run deterministic scoring
-    s = score_opportunity(inp)
+    with metrics.timed("scoring"):
+        s = score_opportunity(inp, policy)
+    with metrics.timed("reasons"):
+        return decide(inp, s, policy)
+
+
+def cached_decision(inp: OpportunityInput) -> DecisionOutput:
+    return cached_decision_json(inp)[0]
+
+
+def cached_decision_json(inp: OpportunityInput, encoded: Optional[bytes] = None) -> EncodedDecision:
+    """
+    Decision plus its JSON bytes, serialized once per computed decision.
+    Identical opportunities (retries, resubmits) reuse both. `encoded` is the
+    input's own JSON if the caller already has it.
+    """
+    return decision_cache.get_or_compute(*_cache_entry(inp, encoded))
+
+
+async def acached_decision_json(inp: OpportunityInput, encoded: Optional[bytes] = None) -> EncodedDecision:
+    """cached_decision_json for callers on the event loop (see DecisionCache.aget_or_compute)."""
+    return await decision_cache.aget_or_compute(*_cache_entry(inp, encoded))
+
 
+def _cache_entry(inp: OpportunityInput, encoded: Optional[bytes]) -> Tuple[str, Callable[[], EncodedDecision]]:
+    # Cache key and computation for `inp` under the current policy
+    policy = get_policy()
+    key = opportunity_key(inp, policy.fingerprint, encoded)
+
+    def compute() -> EncodedDecision:
+        out = mock_decision(inp, policy)
+        with metrics.timed("encode"):
+            return out, pydantic_core.to_json(out)
+
+    return key, compute
+
+
+def mock_decisions(inps: List[OpportunityInput]) -> List[DecisionOutput]:
+    # Score the whole batch in one vectorized pass, then build outputs
+    from .batch_scoring import score_opportunities  # numpy: loaded on first batch, not at startup
+
+    policy = get_policy()
+    with metrics.timed("batch_scoring"):
+        scores = score_opportunities(inps, policy)
+    with metrics.timed("batch_reasons"):
+        return [decide(inp, s, policy) for inp, s in zip(inps, scores)]
+
+
+def decide(inp: OpportunityInput, s: ScoreBreakdown, policy: Optional[Policy] = None) -> DecisionOutput:
     # ------------------------
     # Decision logic
     # ------------------------
-    if s.total_score > 70:
-        decision = "ACCEPT"
-        confidence = 85
-
-    elif s.total_score < 55:
-        decision = "REJECT"
-        confidence = 75
-
-    else:
-        decision = "NEEDS_INFO"
-        confidence = 50
+    decision, confidence = (policy or get_policy()).decision_for(s.total_score)
 
     # ------------------------
     # Reasons & risks
@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .models import OpportunityInput, ScoreBreakdown
+from .policy import Policy, get_policy
+from .scoring import red_flags
+
+# Array versions of the policy lookups in scoring.py. Band edges use the same
+# "value <= edge" rule as Policy.roi_points_for; searchsorted(side="left")
+# counts edges strictly below the value, exactly like bisect_left.
+
+
+def compute_roi_array(cost: np.ndarray, earnings: np.ndarray) -> np.ndarray:
+    safe_cost = np.where(cost <= 0, 1.0, cost)
+    roi = (earnings - cost) / safe_cost
+    zero_cost = np.where(earnings > 0, 10.0, 0.0)
+    return np.where(cost <= 0, zero_cost, roi)
+
+
+def roi_to_score_array(roi: np.ndarray, policy: Policy) -> np.ndarray:
+    return policy.roi_points_array[np.searchsorted(policy.roi_edges_array, roi, side="left")]
+
+
+def feasibility_to_score_array(expected_time_days: np.ndarray, can_close: np.ndarray, policy: Policy) -> np.ndarray:
+    days = np.clip(expected_time_days, 0, policy.feasibility_table.shape[0] - 1)
+    return policy.feasibility_table[days, np.asarray(can_close, dtype=np.int64)]
+
+
+def risk_to_score_array(penalties: np.ndarray, client_modifier: np.ndarray, policy: Policy) -> np.ndarray:
+    return np.clip(policy.risk_base - penalties + client_modifier, 0, policy.risk_max)
+
+
+def motivation_to_score_array(excitement_level: np.ndarray, policy: Policy) -> np.ndarray:
+    return policy.motivation_table[np.clip(excitement_level, 0, len(policy.motivation_table) - 1)]
+
+
+def score_arrays(
+    cost: np.ndarray,
+    earnings: np.ndarray,
+    expected_time_days: np.ndarray,
+    can_close: np.ndarray,
+    penalties: np.ndarray,
+    client_modifier: np.ndarray,
+    excitement_level: np.ndarray,
+    policy: Optional[Policy] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Array version of score_opportunity. All inputs are 1-D arrays of equal length
+    (or broadcastable); returns one array per ScoreBreakdown numeric field.
+    """
+    policy = policy or get_policy()
+    roi = compute_roi_array(cost, earnings)
+    roi_score = roi_to_score_array(roi, policy)
+    feasibility_score = feasibility_to_score_array(expected_time_days, can_close, policy)
+    risk_score = risk_to_score_array(penalties, client_modifier, policy)
+    motivation_score = motivation_to_score_array(excitement_level, policy)
+    total = roi_score + feasibility_score + risk_score + motivation_score
+
+    return {
+        "roi": roi,
+        "roi_score": roi_score,
+        "feasibility_score": feasibility_score,
+        "risk_score": risk_score,
+        "motivation_score": motivation_score,
+        "total_score": np.clip(total, 0, 100),
+    }
+
+
+DECISION_LABELS = ["ACCEPT", "NEEDS_INFO", "REJECT"]
+
+
+def decision_codes_array(total_score: np.ndarray, policy: Optional[Policy] = None) -> np.ndarray:
+    """Index into DECISION_LABELS per cell; same thresholds as Policy.decision_for."""
+    policy = policy or get_policy()
+    codes = np.ones(np.shape(total_score), dtype=np.int8)
+    codes[total_score > policy.accept_threshold] = 0
+    codes[total_score < policy.reject_threshold] = 2
+    return codes
+
+
+def score_opportunities(inps: Sequence[OpportunityInput], policy: Optional[Policy] = None) -> List[ScoreBreakdown]:
+    if not inps:
+        return []
+
+    policy = policy or get_policy()
+    matched = [policy.matcher.find(i.risks_and_concerns) for i in inps]
+
+    cols = score_arrays(
+        cost=np.array([i.cost_to_fulfill for i in inps], dtype=np.float64),
+        earnings=np.array([i.expected_earnings for i in inps], dtype=np.float64),
+        expected_time_days=np.array([i.expected_time_days for i in inps], dtype=np.int64),
+        can_close=np.array([i.can_close_within_timeframe for i in inps], dtype=bool),
+        penalties=np.array([policy.matcher.penalty(m) for m in matched], dtype=np.int64),
+        client_modifier=np.array([policy.client_level_modifier(i.client_level) for i in inps], dtype=np.int64),
+        excitement_level=np.array([i.excitement_level for i in inps], dtype=np.int64),
+        policy=policy,
+    )
+
+    roi = cols["roi"].tolist()
+    roi_score = cols["roi_score"].tolist()
+    feasibility_score = cols["feasibility_score"].tolist()
+    risk_score = cols["risk_score"].tolist()
+    motivation_score = cols["motivation_score"].tolist()
+    total_score = cols["total_score"].tolist()
+
+    return [
+        ScoreBreakdown(
+            roi=float(round(roi[k], 4)),
+            roi_score=roi_score[k],
+            feasibility_score=feasibility_score[k],
+            risk_score=risk_score[k],
+            motivation_score=motivation_score[k],
+            total_score=total_score[k],
+            red_flags=red_flags(inp, roi[k], matched[k]),
+        )
+        for k, inp in enumerate(inps)
+    ]
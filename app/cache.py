@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+import pydantic_core
+
+from .models import DecisionOutput, OpportunityInput
+from .policy import get_policy
+
+DECISION_CACHE_SIZE = int(os.getenv("DECISION_CACHE_SIZE", "4096"))
+DECISION_CACHE_TTL = float(os.getenv("DECISION_CACHE_TTL", "600"))
+
+# A decision together with its JSON bytes, so cache hits skip serialization too
+EncodedDecision = Tuple[DecisionOutput, bytes]
+
+
+def config_fingerprint() -> str:
+    """Hash of the active scoring policy; changes whenever the policy is reloaded."""
+    return get_policy().fingerprint
+
+
+def opportunity_key(inp: OpportunityInput, fingerprint: Optional[str] = None, encoded: Optional[bytes] = None) -> str:
+    """
+    Content address of an opportunity under the given (default: current) scoring
+    policy. `encoded` is the opportunity's JSON if the caller already has it;
+    field order is fixed by the model, so the bytes are canonical.
+    """
+    digest = hashlib.sha256(encoded if encoded is not None else pydantic_core.to_json(inp)).hexdigest()
+    return f"{fingerprint or config_fingerprint()}:{digest}"
+
+
+class DecisionCache:
+    """
+    Bounded LRU + TTL cache of (DecisionOutput, its encoded JSON) by content key.
+    Concurrent misses for the same key share one computation (single-flight),
+    across threads (get_or_compute) and the event loop (aget_or_compute).
+    Cached outputs are shared; callers must not mutate them.
+    """
+
+    def __init__(self, maxsize: int = DECISION_CACHE_SIZE, ttl: float = DECISION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, EncodedDecision]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], EncodedDecision]) -> EncodedDecision:
+        if self.maxsize <= 0:
+            return compute()
+        value, future, owner = self._claim(key)
+        if value is not None:
+            return value
+        if not owner:
+            return future.result()
+        return self._compute(key, future, compute)
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], EncodedDecision]) -> EncodedDecision:
+        """
+        get_or_compute for the event loop. A miss is computed inline (nothing
+        else on the loop runs meanwhile, so duplicates that follow are hits);
+        a miss another thread is already computing is awaited, not blocked on.
+        """
+        if self.maxsize <= 0:
+            return compute()
+        value, future, owner = self._claim(key)
+        if value is not None:
+            return value
+        if not owner:
+            return await asyncio.wrap_future(future)
+        return self._compute(key, future, compute)
+
+    def _claim(self, key: str) -> Tuple[Optional[EncodedDecision], Optional[Future], bool]:
+        # (cached value, None, False) on a hit; else the key's in-flight future
+        # and whether the caller owns it (and must compute)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], None, False
+                del self._entries[key]
+                self.expirations += 1
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+            return None, future, owner
+
+    def _compute(self, key: str, future: Future, compute: Callable[[], EncodedDecision]) -> EncodedDecision:
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+            }
+
+
+decision_cache = DecisionCache()
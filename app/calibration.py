@@ -0,0 +1,243 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch_scoring import DECISION_LABELS, compute_roi_array
+from .policy import Policy
+
+# Candidates scored per work unit: one (candidates x records) score matrix
+CALIBRATION_BLOCK = 256
+METRICS = ("macro_f1", "accuracy")
+
+_CODES = {label: i for i, label in enumerate(DECISION_LABELS)}
+_N = len(DECISION_LABELS)
+# Binary outcomes: a good project should have been accepted, a bad one rejected
+OUTCOME_ALIASES = {"good": "ACCEPT", "bad": "REJECT"}
+
+
+def outcome_code(value: Any) -> int:
+    """Index into DECISION_LABELS for an outcome label (a decision, or good/bad)."""
+    text = str(value).strip()
+    label = OUTCOME_ALIASES.get(text.lower(), text.upper())
+    if label not in _CODES:
+        raise ValueError(f"Unknown outcome {value!r}; use {', '.join(DECISION_LABELS)} or {'/'.join(OUTCOME_ALIASES)}.")
+    return _CODES[label]
+
+
+def labeled_opportunities(store, labels: Dict[int, int]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """(opportunity dicts, outcome codes) for the labeled record ids, in store order; unknown ids are left out."""
+    opps, codes = [], []
+    last = max(labels, default=0)
+    for row_id, rec in store.iter_records():
+        if row_id > last:
+            break
+        if row_id in labels and rec.get("opportunity"):
+            opps.append(rec["opportunity"])
+            codes.append(labels[row_id])
+    return opps, codes
+
+
+def build_features(opps: Sequence[Dict[str, Any]], outcomes: Sequence[int], policy: Policy) -> Dict[str, np.ndarray]:
+    """
+    Everything about the labeled records that the searched settings do not
+    change, computed once: ROI, the feasibility and motivation points, the
+    risk base plus client_level modifier, and a records x keywords matrix of
+    keyword hits (each record's text is matched once, here).
+    """
+    keywords = list(policy.matcher.keywords)
+    hits = np.zeros((len(opps), len(keywords)), dtype=np.float32)
+    column = {k: j for j, k in enumerate(keywords)}
+    for i, opp in enumerate(opps):
+        for k in policy.matcher.find(opp.get("risks_and_concerns") or ""):
+            hits[i, column[k]] = 1
+
+    days = np.clip(np.array([int(o["expected_time_days"]) for o in opps], dtype=np.int64), 0, policy.feasibility_table.shape[0] - 1)
+    can_close = np.array([bool(o["can_close_within_timeframe"]) for o in opps], dtype=np.int64)
+    excitement = np.clip(np.array([int(o["excitement_level"]) for o in opps], dtype=np.int64), 0, len(policy.motivation_table) - 1)
+    modifier = np.array([policy.client_level_modifier(o.get("client_level")) for o in opps], dtype=np.int64)
+    return {
+        "outcome": np.array(outcomes, dtype=np.int64),
+        "roi": compute_roi_array(
+            np.array([float(o["cost_to_fulfill"]) for o in opps], dtype=np.float64),
+            np.array([float(o["expected_earnings"]) for o in opps], dtype=np.float64),
+        ),
+        "fixed_points": (policy.feasibility_table[days, can_close] + policy.motivation_table[excitement]).astype(np.float32),
+        "risk_offset": (policy.risk_base + modifier).astype(np.float32),
+        "risk_max": np.float32(policy.risk_max),
+        "hits": hits,
+    }
+
+
+def sample_candidates(policy: Policy, n: int, spread: float = 0.5, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    `n` candidate policies around `policy` as arrays, one row each; row 0 is
+    `policy` itself. Thresholds move by up to 30 * spread points (REJECT
+    never above ACCEPT), ROI band edges and points by up to `spread` of their
+    value (kept sorted), keyword weights by up to `spread` * 2 of theirs.
+    """
+    rng = np.random.default_rng(seed)
+    n = max(1, n)
+    edges = np.array(policy.roi_edges, dtype=np.float64)
+    points = np.array(policy.roi_points[:-1], dtype=np.float64)
+    weights = np.array(list(policy.matcher.keywords.values()), dtype=np.float64)
+    shift = int(round(30 * spread))
+
+    accept = np.clip(policy.accept_threshold + rng.integers(-shift, shift + 1, n), 0, 100)
+    reject = np.minimum(np.clip(policy.reject_threshold + rng.integers(-shift, shift + 1, n), 0, 100), accept)
+    roi_edges = np.sort(edges + rng.uniform(-spread, spread, (n, len(edges))) * np.maximum(np.abs(edges), 0.25), axis=1)
+    roi_points = np.sort(np.clip(np.rint(points * rng.uniform(1 - spread, 1 + spread, (n, len(points)))), 0, policy.roi_points[-1]), axis=1)
+    kw_weights = np.rint(weights * rng.uniform(max(0.0, 1 - 2 * spread), 1 + 2 * spread, (n, len(weights))))
+
+    accept[0], reject[0], roi_edges[0], roi_points[0], kw_weights[0] = policy.accept_threshold, policy.reject_threshold, edges, points, weights
+    return {
+        "accept": accept.astype(np.int64),
+        "reject": reject.astype(np.int64),
+        "roi_edges": np.round(roi_edges, 4),
+        "roi_points": np.hstack([roi_points, np.full((n, 1), policy.roi_points[-1])]).astype(np.int64),
+        "kw_weights": kw_weights.astype(np.float32),
+    }
+
+
+def candidate_settings(candidates: Dict[str, np.ndarray], i: int, policy: Policy) -> Dict[str, Any]:
+    """Candidate `i` as POLICY_PATH overrides."""
+    return {
+        "ACCEPT_THRESHOLD": int(candidates["accept"][i]),
+        "REJECT_THRESHOLD": int(candidates["reject"][i]),
+        "ROI_BANDS": [[float(e), int(p)] for e, p in zip(candidates["roi_edges"][i], candidates["roi_points"][i][:-1])],
+        "RISK_KEYWORDS": {k: int(w) for k, w in zip(policy.matcher.keywords, candidates["kw_weights"][i])},
+    }
+
+
+def decide_candidates(features: Dict[str, np.ndarray], candidates: Dict[str, np.ndarray]) -> np.ndarray:
+    """(candidates x records) decision codes, the same as scoring each record under each candidate."""
+    # Points are small integers, so float32 is exact and keeps the matrices small
+    total = features["risk_offset"][None, :] - candidates["kw_weights"] @ features["hits"].T  # one product for all keywords
+    np.clip(total, 0, features["risk_max"], out=total)
+    points = candidates["roi_points"].astype(np.float32)
+    total += features["fixed_points"][None, :] + points[:, :1]
+    # ROI points step up at each band edge strictly below the ROI, as in Policy.roi_points_for
+    steps = np.diff(points, axis=1)
+    edges = candidates["roi_edges"]
+    for b in range(edges.shape[1]):
+        total += (features["roi"][None, :] > edges[:, b, None]) * steps[:, b, None]
+    np.clip(total, 0, 100, out=total)
+    # REJECT_THRESHOLD <= ACCEPT_THRESHOLD, so at most one of the two holds
+    above = (total > candidates["accept"][:, None]).view(np.int8)
+    below = (total < candidates["reject"][:, None]).view(np.int8)
+    return 1 + below - above
+
+
+def confusion(outcome: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """(candidates x outcome x decision) counts."""
+    k = codes.shape[0]
+    cells = np.arange(k)[:, None] * (_N * _N) + outcome[None, :] * _N + codes
+    return np.bincount(cells.ravel(), minlength=k * _N * _N).reshape(k, _N, _N)
+
+
+def score_metrics(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per candidate: precision/recall/F1 per decision, macro F1 over the outcomes present, accuracy."""
+    hits = np.diagonal(matrix, axis1=1, axis2=2).astype(np.float64)
+    predicted = matrix.sum(axis=1)
+    actual = matrix.sum(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, hits / predicted, 0.0)
+        recall = np.where(actual > 0, hits / actual, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    present = actual[0] > 0
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "macro_f1": f1[:, present].mean(axis=1) if present.any() else np.zeros(len(matrix)),
+        "accuracy": hits.sum(axis=1) / np.maximum(actual.sum(axis=1), 1),
+    }
+
+
+_features: Optional[Dict[str, np.ndarray]] = None
+
+
+def _init_worker(features: Dict[str, np.ndarray]) -> None:
+    # Features are shipped to each worker once, not with every block
+    global _features
+    _features = features
+
+
+def _score_block(block: Dict[str, np.ndarray]) -> np.ndarray:
+    return confusion(_features["outcome"], decide_candidates(_features, block))
+
+
+def _blocks(candidates: Dict[str, np.ndarray], size: int) -> Iterable[Dict[str, np.ndarray]]:
+    n = len(candidates["accept"])
+    for start in range(0, n, size):
+        yield {k: v[start:start + size] for k, v in candidates.items()}
+
+
+def calibrate(
+    opps: Sequence[Dict[str, Any]],
+    outcomes: Sequence[int],
+    policy: Policy,
+    candidates: int = 5000,
+    spread: float = 0.5,
+    seed: int = 0,
+    workers: int = 1,
+    metric: str = "macro_f1",
+    top: int = 5,
+) -> Dict[str, Any]:
+    """
+    Random search around `policy` for the thresholds, ROI bands and risk
+    keyword weights that best reproduce the labeled outcomes. Returns a report
+    whose "best"["policy"] is a POLICY_PATH-compatible set of overrides.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; use one of {', '.join(METRICS)}.")
+    if not opps:
+        raise ValueError("No labeled records to calibrate against.")
+
+    t0 = time.perf_counter()
+    features = build_features(opps, outcomes, policy)
+    cands = sample_candidates(policy, candidates, spread, seed)
+    blocks = _blocks(cands, CALIBRATION_BLOCK)
+    if workers <= 1:
+        _init_worker(features)
+        parts = [_score_block(b) for b in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features,)) as pool:
+            parts = list(pool.map(_score_block, blocks))
+    matrix = np.concatenate(parts)
+    scores = score_metrics(matrix)
+    elapsed = time.perf_counter() - t0
+
+    # Ties go to the candidate closest to the current policy (lowest index, 0 = current)
+    order = np.lexsort((np.arange(len(matrix)), -scores[metric]))
+
+    def summary(i: int) -> Dict[str, Any]:
+        return {
+            "candidate": int(i),
+            "macro_f1": round(float(scores["macro_f1"][i]), 4),
+            "accuracy": round(float(scores["accuracy"][i]), 4),
+            "per_decision": {
+                label: {
+                    "precision": round(float(scores["precision"][i, c]), 4),
+                    "recall": round(float(scores["recall"][i, c]), 4),
+                    "f1": round(float(scores["f1"][i, c]), 4),
+                    "predicted": int(matrix[i, :, c].sum()),
+                    "actual": int(matrix[i, c, :].sum()),
+                }
+                for c, label in enumerate(DECISION_LABELS)
+            },
+            "policy": candidate_settings(cands, i, policy),
+        }
+
+    return {
+        "records": len(opps),
+        "outcomes": dict(zip(DECISION_LABELS, np.bincount(features["outcome"], minlength=_N).tolist())),
+        "candidates": len(matrix),
+        "metric": metric,
+        "baseline": summary(0),
+        "best": summary(order[0]),
+        "top": [summary(i) for i in order[:top]],
+        "elapsed_s": round(elapsed, 3),
+        "candidates_per_s": round(len(matrix) / elapsed) if elapsed > 0 else None,
+    }
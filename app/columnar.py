@@ -0,0 +1,262 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import memory
+from .segments import SegmentedLog
+
+# Flat history columns shared by the CSV export, the UI loader and compaction.
+COLUMNS = [
+    "timestamp",
+    "opportunity_title",
+    "client_type",
+    "client_level",
+    "expected_time_days",
+    "cost_to_fulfill",
+    "expected_earnings",
+    "decision",
+    "confidence",
+    "total_score",
+    "summary",
+]
+
+# How each column is laid out on disk:
+#   int/float -> one .npy array (missing: INT_NULL / NaN)
+#   category  -> int32 codes .npy + dictionary in the part manifest
+#   text      -> utf-8 bytes .npy + int64 offsets .npy
+COLUMN_KINDS = {
+    "timestamp": "text",
+    "opportunity_title": "text",
+    "client_type": "category",
+    "client_level": "category",
+    "expected_time_days": "int",
+    "cost_to_fulfill": "float",
+    "expected_earnings": "float",
+    "decision": "category",
+    "confidence": "int",
+    "total_score": "int",
+    "summary": "text",
+}
+
+INT_NULL = np.iinfo(np.int64).min
+MANIFEST_NAME = "manifest.json"
+# Rows per compacted part: compaction holds one part in memory at a time
+PART_ROWS = 50000
+# Rows decoded at a time when iter_rows() walks a part
+ITER_SLICE_ROWS = 4096
+
+
+def record_to_row(rec: Dict[str, Any]) -> Dict[str, Any]:
+    opp = rec.get("opportunity", {}) or {}
+
+    # Memory stores the decision under "result", but "decision" is supported just in case.
+    dec = rec.get("result") or rec.get("decision") or {}
+
+    return {
+        "timestamp": rec.get("timestamp", ""),
+        "opportunity_title": opp.get("opportunity_title", ""),
+        "client_type": opp.get("client_type", ""),
+        "client_level": opp.get("client_level", ""),
+        "expected_time_days": opp.get("expected_time_days", ""),
+        "cost_to_fulfill": opp.get("cost_to_fulfill", ""),
+        "expected_earnings": opp.get("expected_earnings", ""),
+        "decision": dec.get("decision", ""),
+        "confidence": dec.get("confidence", ""),
+        "total_score": (dec.get("score", {}) or {}).get("total_score", ""),
+        "summary": dec.get("summary", ""),
+    }
+
+
+def default_columns_dir(path: str) -> str:
+    root, _ = os.path.splitext(path)
+    return root + ".columns"
+
+
+class ColumnarHistory:
+    """
+    Memory-mapped columnar view of the compacted prefix of the memory log.
+    Rows past `compacted_offset` (a global log offset, see app.segments) are
+    still read from the log tail.
+    """
+
+    def __init__(self, path: Optional[str] = None, columns_dir: Optional[str] = None):
+        self.path = path or memory.MEMORY_PATH
+        self.columns_dir = columns_dir or default_columns_dir(self.path)
+        self.parts: List[Dict[str, Any]] = []
+        self.compacted_offset = 0
+        self._load_manifest()
+
+    def _load_manifest(self) -> None:
+        try:
+            with open(os.path.join(self.columns_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Log replaced or truncated since compaction -> columns no longer describe it
+        if manifest.get("compacted_offset", 0) > SegmentedLog(self.path).end_offset:
+            return
+        self.parts = manifest.get("parts", [])
+        self.compacted_offset = manifest.get("compacted_offset", 0)
+
+    @property
+    def rows(self) -> int:
+        return sum(p["rows"] for p in self.parts)
+
+    def _open(self, part: Dict[str, Any], name: str) -> np.ndarray:
+        return np.load(os.path.join(self.columns_dir, part["name"], name + ".npy"), mmap_mode="r")
+
+    def part_column(self, part: Dict[str, Any], name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Rows [start, stop) of one column of one part: numbers for int/float,
+        object arrays of strings for category and text. Only that slice of a
+        text column is read and decoded.
+        """
+        stop = part["rows"] if stop is None else min(stop, part["rows"])
+        kind = COLUMN_KINDS[name]
+        if kind in ("int", "float"):
+            return self._open(part, name)[start:stop]
+        if kind == "category":
+            dictionary = np.array(part["dictionaries"][name], dtype=object)
+            codes = self._open(part, name)[start:stop]
+            return dictionary[codes] if len(dictionary) else np.array([""] * len(codes), dtype=object)
+        offsets = self._open(part, name + ".offsets")[start:stop + 1]
+        if len(offsets) < 2:
+            return np.array([], dtype=object)
+        data = self._open(part, name)[offsets[0]:offsets[-1]].tobytes()
+        rel = (offsets - offsets[0]).tolist()
+        return np.array([data[rel[i]:rel[i + 1]].decode("utf-8") for i in range(len(rel) - 1)], dtype=object)
+
+    def column(self, name: str) -> np.ndarray:
+        """Compacted values of one column across all parts (no JSON decoding)."""
+        chunks = [self.part_column(p, name) for p in self.parts]
+        if not chunks:
+            return np.array([], dtype=object if COLUMN_KINDS[name] in ("category", "text") else np.float64)
+        return np.concatenate(chunks)
+
+    def iter_rows(
+        self,
+        columns: Sequence[str] = COLUMNS,
+        offset: int = 0,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yields (end_offset, row) for every record ending after `offset`: compacted
+        parts first (only the requested columns are touched, ITER_SLICE_ROWS
+        rows at a time, so memory stays flat), then the log tail. Parts,
+        segments and blocks entirely outside `since`/`until` are skipped, but
+        rows are not filtered one by one.
+        """
+        for part in self.parts:
+            if part["end"] <= offset:
+                continue
+            if (since and part.get("last_ts") is not None and part["last_ts"] < since) or (
+                until and part.get("first_ts") is not None and part["first_ts"] >= until
+            ):
+                continue
+            ends = self._open(part, "_offset")
+            for start in range(int(np.searchsorted(ends, offset, side="right")), part["rows"], ITER_SLICE_ROWS):
+                stop = min(start + ITER_SLICE_ROWS, part["rows"])
+                cols = {name: self.part_column(part, name, start, stop) for name in columns}
+                for i, end in enumerate(ends[start:stop].tolist()):
+                    yield end, {name: _to_python(cols[name][i], name) for name in columns}
+
+        log = SegmentedLog(self.path)
+        for end, rec in log.iter_from(max(offset, self.compacted_offset), since, until):
+            row = record_to_row(rec)
+            yield end, {name: row[name] for name in columns}
+
+
+def _to_python(value: Any, name: str) -> Any:
+    kind = COLUMN_KINDS[name]
+    if kind == "int":
+        return "" if value == INT_NULL else int(value)
+    if kind == "float":
+        return "" if np.isnan(value) else float(value)
+    return value
+
+
+def _encode_part(rows: List[Dict[str, Any]], ends: List[int], out_dir: str) -> Dict[str, Any]:
+    os.makedirs(out_dir, exist_ok=True)
+    dictionaries: Dict[str, List[str]] = {}
+
+    np.save(os.path.join(out_dir, "_offset.npy"), np.array(ends, dtype=np.int64))
+    for name, kind in COLUMN_KINDS.items():
+        values = [r[name] for r in rows]
+        if kind == "int":
+            arr = np.array([INT_NULL if v in ("", None) else int(v) for v in values], dtype=np.int64)
+        elif kind == "float":
+            arr = np.array([np.nan if v in ("", None) else float(v) for v in values], dtype=np.float64)
+        elif kind == "category":
+            lookup: Dict[str, int] = {}
+            arr = np.array([lookup.setdefault(str(v), len(lookup)) for v in values], dtype=np.int32)
+            dictionaries[name] = list(lookup)
+        else:
+            encoded = [str(v).encode("utf-8") for v in values]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            np.save(os.path.join(out_dir, name + ".offsets.npy"), offsets)
+            arr = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        np.save(os.path.join(out_dir, name + ".npy"), arr)
+
+    return {"dictionaries": dictionaries}
+
+
+def compact(
+    path: Optional[str] = None, columns_dir: Optional[str] = None, min_rows: int = 1, part_rows: int = PART_ROWS
+) -> int:
+    """
+    Compacts the records of sealed (rotated) segments appended since the last
+    compaction into new columnar parts of up to `part_rows` rows; the live
+    file is left to the readers' log tail. Parts are written one at a time and
+    the manifest is updated after each, so memory stays bounded and an
+    interrupted run keeps what it finished. Returns the number of rows
+    compacted (0, writing nothing, if fewer than `min_rows`).
+    """
+    history = ColumnarHistory(path, columns_dir)
+    log = SegmentedLog(history.path)
+    sealed_end = log.active_base
+    part_rows = max(1, part_rows, min_rows)  # the first flush already has min_rows
+
+    parts = list(history.parts)
+    start = history.compacted_offset
+    rows: List[Dict[str, Any]] = []
+    ends: List[int] = []
+    total = 0
+    for end, rec in log.iter_from(start):
+        if end > sealed_end:
+            break
+        rows.append(record_to_row(rec))
+        ends.append(end)
+        if len(rows) >= part_rows:
+            total += _write_part(history.columns_dir, parts, start, rows, ends)
+            start, rows, ends = ends[-1], [], []
+    if rows and (total or len(rows) >= min_rows):
+        total += _write_part(history.columns_dir, parts, start, rows, ends)
+    return total
+
+
+def _write_part(columns_dir: str, parts: List[Dict[str, Any]], start: int, rows: List[Dict[str, Any]], ends: List[int]) -> int:
+    """Encodes one part, adds it to `parts` and the manifest; returns its row count."""
+    name = f"part-{len(parts):05d}"
+    part = _encode_part(rows, ends, os.path.join(columns_dir, name))
+    stamps = [r["timestamp"] for r in rows if r["timestamp"]]
+    part.update({
+        "name": name,
+        "start": start,
+        "end": ends[-1],
+        "rows": len(rows),
+        "first_ts": min(stamps) if stamps else None,
+        "last_ts": max(stamps) if stamps else None,
+    })
+    parts.append(part)
+
+    manifest = {"parts": parts, "compacted_offset": ends[-1]}
+    manifest_path = os.path.join(columns_dir, MANIFEST_NAME)
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, manifest_path)
+    return len(rows)
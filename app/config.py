@@ -1,37 +1,66 @@
 # app/config.py
+# Scoring policy. app/policy.py compiles these into lookup tables; a JSON file
+# at POLICY_PATH with any of the same keys overrides them and is hot-reloaded.
 
-# Decision thresholds
+# Decision thresholds (total_score > ACCEPT → ACCEPT, total_score < REJECT → REJECT)
 ACCEPT_THRESHOLD = 70
 REJECT_THRESHOLD = 55
 
-# ROI settings
-ROI_GOOD = 1.5
-ROI_OK = 1.0
-ROI_CAP = 3.0
+# ROI bands: first (max_roi, points) with roi <= max_roi wins, else ROI_MAX_POINTS
+ROI_BANDS = [
+    (-0.25, 0),
+    (0.0, 8),
+    (0.5, 16),
+    (1.0, 22),
+    (2.0, 27),
+]
+ROI_MAX_POINTS = 30
 
-# Motivation (excitement) weighting
-MOTIVATION_MAX_POINTS = 10
+# Feasibility: first (max_days, points) with days <= max_days wins, else FEASIBILITY_LONG_POINTS
+FEASIBILITY_DAY_BANDS = [
+    (14, 25),
+    (30, 22),
+    (60, 20),
+    (120, 16),
+]
+FEASIBILITY_LONG_POINTS = 10
+CANNOT_CLOSE_PENALTY = 8
+FEASIBILITY_MAX_POINTS = 25
 
-# Client risk weights
+# Motivation (excitement 0..10) weighting
+MOTIVATION_MAX_POINTS = 20
+
+# Risk: base points + client level modifier - keyword penalties, clamped to 0..RISK_MAX_POINTS
+RISK_BASE_POINTS = 20
+RISK_MAX_POINTS = 25
+
+# Client risk modifiers
 CLIENT_LEVEL_RISK = {
-    "low": 0,
-    "normal": 2,
-    "high": 6,
-    "sensitive": 10,
+    "sensitive": -12,
+    "high": -7,
+    "normal": 0,
+    "low": 3,
 }
 
-# Risk keywords → extra risk points
+# Risk keywords → risk penalty points
 RISK_KEYWORDS = {
+    "scope": 4,
     "unclear": 4,
-    "scope": 3,
-    "creep": 4,
-    "urgent": 2,
+    "urgent": 3,
+    "deadline": 3,
     "legal": 6,
-    "refund": 4,
+    "refund": 5,
+    "complaint": 4,
+    "chargeback": 6,
+    "security": 5,
+    "integration": 3,
+    "api": 2,
+    "unknown": 3,
+    "no budget": 7,
+    "delay": 3,
 }
 
 # Output confidence defaults
 CONF_ACCEPT = 85
 CONF_NEEDS_INFO = 50
 CONF_REJECT = 75
-
@@ -0,0 +1,95 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+from .columnar import COLUMNS, INT_NULL, ColumnarHistory, record_to_row
+from .segments import INDEX_NAME, SegmentedLog, default_segments_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class HistoryLoader:
+    """
+    Incrementally loads the memory log (sealed segments + live file) into a DataFrame.
+
+    The parsed frame is cached against the log identity (live file inode, size,
+    mtime and the segment index mtime). New records are read from the last
+    global offset on, so a rotation costs nothing; if the log was replaced or
+    truncated the cache is rebuilt from scratch, starting from the compacted
+    columns (see app.columnar) when there are any. With `since`, segments and
+    blocks that end before that timestamp are never opened.
+
+    pandas is imported on the first load(), not with this module.
+    """
+
+    def __init__(self, path: str, since: Optional[str] = None):
+        self.path = path
+        self.since = since
+        self._lock = threading.Lock()
+        self._identity: Optional[Tuple[Any, ...]] = None
+        self._offset = 0
+        self._df: Optional["pd.DataFrame"] = None
+
+    def _stat(self) -> Tuple[Any, ...]:
+        out: List[Any] = []
+        for p in (self.path, os.path.join(default_segments_dir(self.path), INDEX_NAME)):
+            try:
+                st = os.stat(p)
+                out.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                out.append(None)
+        return tuple(out)
+
+    def load(self) -> "pd.DataFrame":
+        import pandas as pd
+
+        with self._lock:
+            if self._df is None:
+                self._df = pd.DataFrame()
+            identity = self._stat()
+            if identity == self._identity:
+                return self._df
+
+            log = SegmentedLog(self.path)
+            if not log.exists:
+                self._reset()
+                return self._df
+            if self._identity is None or self._offset > log.end_offset:
+                self._reset()
+                self._load_compacted()
+
+            rows = []
+            for self._offset, rec in log.iter_from(self._offset, since=self.since):
+                row = record_to_row(rec)
+                if not self.since or row["timestamp"] >= self.since:
+                    rows.append(row)
+            self._identity = identity
+
+            if rows:
+                chunk = pd.DataFrame(rows, columns=COLUMNS)
+                self._df = chunk if self._df.empty else pd.concat([self._df, chunk], ignore_index=True)
+            return self._df
+
+    def _load_compacted(self) -> None:
+        import pandas as pd
+
+        history = ColumnarHistory(self.path)
+        if not history.parts:
+            return
+        self._df = pd.DataFrame({name: history.column(name) for name in COLUMNS})
+        for name in ("expected_time_days", "confidence", "total_score"):
+            # Keep missing ints as "" like rows parsed from JSON
+            missing = self._df[name] == INT_NULL
+            if missing.any():
+                self._df[name] = self._df[name].astype(object).where(~missing, "")
+        if self.since:
+            self._df = self._df[self._df["timestamp"] >= self.since].reset_index(drop=True)
+        self._offset = history.compacted_offset
+
+    def _reset(self) -> None:
+        import pandas as pd
+
+        self._identity = None
+        self._offset = 0
+        self._df = pd.DataFrame()
@@ -0,0 +1,64 @@
+import re
+from typing import Dict, List
+
+
+def _trie_pattern(words: List[str]) -> str:
+    # Nested alternation sharing common prefixes, so the regex engine does not
+    # retry every keyword at every offset.
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional: the longest keyword at an offset wins, shorter ones are implied
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword occurring as a substring of a text.
+    Equivalent to `[k for k in keywords if k in text.lower()]`.
+
+    Large keyword sets are compiled into one prefix-trie regex and found in a
+    single pass. Below SCAN_LIMIT keywords, per-keyword `in` checks (C substring
+    search) are faster than any pure-regex scan, so those are used instead.
+    """
+
+    SCAN_LIMIT = 128
+
+    def __init__(self, keywords: Dict[str, int]):
+        self.keywords = dict(keywords)
+        self._order = {k: i for i, k in enumerate(self.keywords)}
+        self._pattern = None
+        if len(self.keywords) >= self.SCAN_LIMIT:
+            # Lookahead so overlapping hits at different offsets are all reported
+            self._pattern = re.compile(f"(?=({_trie_pattern(list(self.keywords))}))")
+        self._prefixes = {
+            k: [p for p in self.keywords if p != k and k.startswith(p)] for k in self.keywords
+        }
+
+    def find(self, text: str) -> List[str]:
+        t = (text or "").lower()
+        if not t:
+            return []
+        if self._pattern is None:
+            return [k for k in self.keywords if k in t]
+        hits = set()
+        for m in self._pattern.finditer(t):
+            k = m.group(1)
+            if k not in hits:
+                hits.add(k)
+                hits.update(self._prefixes[k])
+        return sorted(hits, key=self._order.__getitem__)
+
+    def penalty(self, matched: List[str]) -> int:
+        return sum(self.keywords[k] for k in matched)
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pydantic_core
+
+from .agent import decide
+from .cache import EncodedDecision
+from .metrics import metrics
+from .models import DecisionOutput, OpportunityInput, ScoreBreakdown
+from .policy import Policy, get_policy
+from .scoring import score_opportunity
+from .utils import JsonObjectExtractor, extract_json_object
+
+logger = logging.getLogger(__name__)
+
+# Any OpenAI-compatible chat completions API (or benchmarks/llm_stub.py)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.openai.com/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY") or os.getenv("OPENAI_API_KEY", "")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+# Whole model call, including waiting for a pool slot; past it the rule-based decision is used
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+# Model requests in flight at once per process; the rest wait for a slot
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "memory/llm_cache.db")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "0"))  # seconds, 0 = keep forever
+# Stream the reply and stop reading once the JSON object closes ("0" for servers without SSE)
+LLM_STREAM = os.getenv("LLM_STREAM", "1") == "1"
+
+SYSTEM_PROMPT = (
+    "You evaluate business opportunities for a freelancer. You get the opportunity and its "
+    "deterministic score breakdown (ROI, feasibility, risk and motivation points, total out of 100). "
+    "Reply with one JSON object only, with keys: "
+    '"decision" (one of "ACCEPT", "REJECT", "NEEDS_INFO"), "confidence" (integer 0-100), '
+    '"summary" (at most 300 characters), "key_reasons", "risks", "next_actions" '
+    "(lists of at most 7 short strings each)."
+)
+
+# Engine labels reported in the X-Decision-Engine header
+ENGINE_LLM = "llm"
+ENGINE_FALLBACK = "rules-fallback"
+
+
+def build_messages(inp: OpportunityInput, score: ScoreBreakdown) -> List[Dict[str, str]]:
+    user = {"opportunity": inp.model_dump(), "score": score.model_dump()}
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(user, ensure_ascii=False, sort_keys=True)},
+    ]
+
+
+def prompt_key(model: str, messages: List[Dict[str, str]]) -> str:
+    raw = json.dumps([model, messages], ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def parse_decision(content: str, score: ScoreBreakdown) -> DecisionOutput:
+    """The model's reply text as a DecisionOutput."""
+    return decision_from(extract_json_object(content), score)
+
+
+def decision_from(data: Dict[str, Any], score: ScoreBreakdown) -> DecisionOutput:
+    """The model's JSON object as a DecisionOutput; the score breakdown stays the deterministic one."""
+    fields = {k: data[k] for k in ("decision", "confidence", "summary", "key_reasons", "risks", "next_actions") if k in data}
+    return DecisionOutput.model_validate(dict(fields, score=score.model_dump()))
+
+
+class LlmCache:
+    """
+    Persistent cache of model decisions (their encoded DecisionOutput JSON),
+    keyed by prompt_key(). SQLite in WAL mode, one connection per thread.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, output BLOB NOT NULL, created REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute("SELECT output, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl > 0 and time.time() - row[1] > self.ttl):
+            return None
+        return bytes(row[0])
+
+    def put(self, key: str, model: str, output: bytes) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, output, created) VALUES (?, ?, ?, ?)",
+                (key, model, output, time.time()),
+            )
+
+
+class LlmEngine:
+    """
+    Model-backed decisions behind the DecisionOutput contract.
+
+    Runs on the event loop: the HTTP call is async and SQLite cache access goes
+    to a thread, so a slow model holds no request worker. Identical prompts in
+    flight share one model call; at most `concurrency` calls run at once and
+    each (slot wait included) is cut off after `timeout` seconds. Timeouts,
+    HTTP errors and unusable replies fall back to the rule-based decision.
+    """
+
+    def __init__(
+        self,
+        base_url: str = LLM_BASE_URL,
+        api_key: str = LLM_API_KEY,
+        model: str = LLM_MODEL,
+        timeout: float = LLM_TIMEOUT,
+        concurrency: int = LLM_CONCURRENCY,
+        cache: Optional[LlmCache] = None,
+        stream: bool = LLM_STREAM,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.stream = stream
+        self.cache = cache or LlmCache()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._inflight: Dict[str, "asyncio.Task[Tuple[EncodedDecision, str]]"] = {}
+        self._client: Any = None
+
+    def _http(self):
+        if self._client is None:
+            import httpx  # only needed once the model is actually called
+
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def decide(self, inp: OpportunityInput, policy: Optional[Policy] = None) -> Tuple[EncodedDecision, str]:
+        """((decision, its JSON bytes), engine label) for one opportunity."""
+        policy = policy or get_policy()
+        score = score_opportunity(inp, policy)
+        messages = build_messages(inp, score)
+        key = prompt_key(self.model, messages)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(key, messages, inp, score, policy))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.inc("llm_requests_total", result="coalesced")
+        # Shielded: a disconnecting caller does not cancel the call others wait on
+        return await asyncio.shield(task)
+
+    async def _resolve(
+        self, key: str, messages: List[Dict[str, str]], inp: OpportunityInput, score: ScoreBreakdown, policy: Policy
+    ) -> Tuple[EncodedDecision, str]:
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            metrics.inc("llm_requests_total", result="cache_hit")
+            return (DecisionOutput.model_validate_json(cached), cached), ENGINE_LLM
+
+        try:
+            with metrics.timed("llm"):
+                data = await asyncio.wait_for(self._complete(messages), self.timeout)
+            out = decision_from(data, score)
+        except Exception as e:
+            # ValueError covers unparsable JSON and replies failing DecisionOutput validation
+            reason = "timeout" if isinstance(e, asyncio.TimeoutError) else "invalid" if isinstance(e, ValueError) else "error"
+            metrics.inc("llm_requests_total", result=f"fallback_{reason}")
+            logger.warning("LLM decision failed (%s), using rules: %r", reason, e)
+            out = decide(inp, score, policy)
+            return (out, pydantic_core.to_json(out)), ENGINE_FALLBACK
+
+        metrics.inc("llm_requests_total", result="model")
+        encoded = pydantic_core.to_json(out)
+        await asyncio.to_thread(self.cache.put, key, self.model, encoded)
+        return (out, encoded), ENGINE_LLM
+
+    async def _complete(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """The JSON object in the model's reply."""
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+        }
+        async with self._slots:
+            if not self.stream:
+                resp = await self._http().post("/chat/completions", json=body)
+                resp.raise_for_status()
+                try:
+                    content = resp.json()["choices"][0]["message"]["content"]
+                except (KeyError, IndexError, TypeError) as e:
+                    raise ValueError(f"Unexpected completion response: {e!r}") from None
+                return extract_json_object(content)
+
+            # Server-sent events: feed each delta to the extractor and hang up as
+            # soon as the object closes, without waiting for trailing tokens.
+            extractor = JsonObjectExtractor()
+            started = time.perf_counter()
+            async with self._http().stream("POST", "/chat/completions", json=dict(body, stream=True)) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        delta = json.loads(data)["choices"][0]["delta"].get("content") or ""
+                    except (KeyError, IndexError, TypeError, AttributeError) as e:
+                        raise ValueError(f"Unexpected completion chunk: {e!r}") from None
+                    decided = "decision" in extractor.fields
+                    if extractor.feed(delta) is not None:
+                        break
+                    if not decided and "decision" in extractor.fields:
+                        metrics.observe("llm_decision_streamed", time.perf_counter() - started)
+            if extractor.finish() is None:
+                raise ValueError("No JSON object found in model output.")
+            return extractor.result
+
+
+_engine: Optional[LlmEngine] = None
+
+
+def get_llm_engine() -> LlmEngine:
+    """Process-wide engine; created on first use from the event loop that serves requests."""
+    global _engine
+    if _engine is None:
+        _engine = LlmEngine()
+    return _engine
+
+
+async def close_llm_engine() -> None:
+    global _engine
+    engine, _engine = _engine, None
+    if engine is not None:
+        await engine.aclose()
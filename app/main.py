@@ -1,9 +1,79 @@
-from .memory import append_memory, build_record
-from fastapi import FastAPI, HTTPException
-from .models import OpportunityInput, DecisionOutput
-from .agent import mock_decision
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import pydantic_core
+from .memory import encode_record, get_similar_index, get_stats, get_store, query_decisions
+from .memory_writer import MemoryQueueFull, close_memory_writer, enqueue_memory, enqueue_memory_many, get_memory_writer
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .models import ClientLevel, Decision, DecisionEngine, EvaluateOutput, OpportunityInput, DecisionOutput, ReplayInput, SensitivityInput, SensitivityOutput
+from .storage import DecisionQuery
+from .agent import acached_decision_json, mock_decisions
+from .cache import decision_cache
+from .llm import close_llm_engine, get_llm_engine
+from .metrics import metrics, sample_profile
+from .policy import compile_policy, get_policy
 
-app = FastAPI(title="Decision-Making AI Agent", version="0.1.0")
+# Enables POST /debug/profile (sampling profiler); off by default
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+
+# Default engine for /evaluate: "rules" (deterministic scorer) or "llm" (see app.llm); ?engine= overrides
+DECISION_ENGINE = os.getenv("DECISION_ENGINE", "rules")
+
+# Load shedding for /evaluate and /evaluate/batch: 503 once the memory queue would hold more records than this (0 = off)
+EVALUATE_SHED_QUEUE_DEPTH = int(os.getenv("EVALUATE_SHED_QUEUE_DEPTH", "8000"))
+# Requests that already waited longer than this before being handled get 503 (0 = off)
+EVALUATE_TIMEOUT_MS = float(os.getenv("EVALUATE_TIMEOUT_MS", "2000"))
+# Largest batch /evaluate/batch accepts; bigger ones fail validation (422) before any scoring
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    writer = get_memory_writer()
+    metrics.gauge("memory_queue_depth", lambda: writer.queue_depth)
+    metrics.gauge("decision_cache_hits", lambda: decision_cache.hits)
+    metrics.gauge("decision_cache_misses", lambda: decision_cache.misses)
+    metrics.gauge("decision_cache_evictions", lambda: decision_cache.evictions)
+    # Load the stats snapshot and catch it up with the log before serving; the
+    # similarity index warms up in the background (lookups see what is loaded so far)
+    stats = get_stats()
+    similar = get_similar_index()
+    metrics.gauge("similar_index_docs", lambda: len(similar))
+    yield
+    await close_llm_engine()
+    # Drain queued records before the worker exits
+    close_memory_writer()
+    stats.save()
+    similar.save()
+
+
+app = FastAPI(title="Decision-Making AI Agent", version="0.1.0", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    # Handlers read request_start to attribute parsing/validation vs handler time
+    start = request.state.request_start = time.perf_counter()
+    response = await call_next(request)
+    end = time.perf_counter()
+    handler_end = getattr(request.state, "handler_end", None)
+    if handler_end is not None:
+        metrics.observe("serialization", end - handler_end)
+    metrics.observe("request", end - start)
+    return response
+
+
+def mark_handler_start(request: Request) -> None:
+    start = getattr(request.state, "request_start", None)
+    if start is not None:
+        metrics.observe("validation", time.perf_counter() - start)
+
+
+def mark_handler_end(request: Request) -> None:
+    request.state.handler_end = time.perf_counter()
 
 
 @app.get("/health")
@@ -11,16 +81,178 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/evaluate", response_model=DecisionOutput)
-def evaluate(opportunity: OpportunityInput):
+def shed_load(request: Request, records: int = 1) -> None:
+    """
+    Rejects work we should not start: stale requests, or `records` memory
+    writes that would take the queue past EVALUATE_SHED_QUEUE_DEPTH records
+    (a batch larger than that is only let in while the queue is empty).
+    """
+    start = getattr(request.state, "request_start", None)
+    if EVALUATE_TIMEOUT_MS > 0 and start is not None:
+        waited_ms = (time.perf_counter() - start) * 1000
+        if waited_ms > EVALUATE_TIMEOUT_MS:
+            metrics.inc("shed_total", reason="timeout")
+            raise HTTPException(status_code=503, detail="Request timed out before evaluation.")
+    if EVALUATE_SHED_QUEUE_DEPTH > 0 and get_memory_writer().queued_records + min(records, EVALUATE_SHED_QUEUE_DEPTH) > EVALUATE_SHED_QUEUE_DEPTH:
+        metrics.inc("shed_total", reason="queue_depth")
+        raise HTTPException(status_code=503, detail="Server busy; try again later.")
+
+
+class EncodedJSONResponse(JSONResponse):
+    """
+    JSON response whose body may already be encoded bytes, which are sent as is:
+    FastAPI neither re-validates nor re-serializes them. /docs still shows the
+    route's response_model.
+    """
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else super().render(content)
+
+
+def with_similar(output_json: bytes, similar: list) -> bytes:
+    # The cached decision bytes plus this request's "similar" list (memory changes, the decision does not)
+    return output_json[:-1] + b',"similar":' + pydantic_core.to_json(similar) + b"}"
+
+
+@app.post("/evaluate", response_model=EvaluateOutput, response_class=EncodedJSONResponse)
+async def evaluate(
+    opportunity: OpportunityInput,
+    request: Request,
+    engine: Optional[DecisionEngine] = Query(None, description="Decision engine (default: DECISION_ENGINE)"),
+):
+    # Runs on the event loop: scoring is CPU-light, the model call (engine=llm)
+    # is awaited and the memory write is a non-blocking enqueue. Only the
+    # similar lookup goes to the threadpool, since it shares the index lock
+    # with the memory writer's folds and the warm-up load.
+    mark_handler_start(request)
+    shed_load(request)
     try:
-        decision_output = mock_decision(opportunity)
-        append_memory(build_record(opportunity, decision_output))
-        return decision_output
+        # Input and output are each encoded once; the same bytes form the
+        # cache key, the memory record and the response body.
+        opportunity_json = pydantic_core.to_json(opportunity)
+        if (engine or DECISION_ENGINE) == "llm":
+            (decision_output, output_json), used = await get_llm_engine().decide(opportunity)
+        else:
+            decision_output, output_json = await acached_decision_json(opportunity, opportunity_json)
+            used = "rules"
+        with metrics.timed("similar"):
+            similar = await run_in_threadpool(get_similar_index().query, opportunity.model_dump())
+        with metrics.timed("memory_enqueue"):
+            enqueue_memory(encode_record(opportunity_json, output_json), block=False)
+        metrics.inc("decisions_total", decision=decision_output.decision)
+        return EncodedJSONResponse(with_similar(output_json, similar), headers={"X-Decision-Engine": used})
+    except MemoryQueueFull as e:
+        metrics.inc("errors_total", stage="memory_enqueue")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        metrics.inc("errors_total", stage="evaluate")
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        mark_handler_end(request)
+
+
+@app.post("/evaluate/batch", response_model=List[DecisionOutput], response_class=EncodedJSONResponse)
+def evaluate_batch(request: Request, opportunities: List[OpportunityInput] = Body(..., max_length=BATCH_MAX_ITEMS)):
+    mark_handler_start(request)
+    shed_load(request, records=len(opportunities))
+    try:
+        decision_outputs = mock_decisions(opportunities)
+        with metrics.timed("encode"):
+            outputs_json = [pydantic_core.to_json(out) for out in decision_outputs]
+        with metrics.timed("memory_enqueue"):
+            enqueue_memory_many(
+                encode_record(pydantic_core.to_json(opp), out)
+                for opp, out in zip(opportunities, outputs_json)
+            )
+        for out in decision_outputs:
+            metrics.inc("decisions_total", decision=out.decision)
+        return EncodedJSONResponse(b"[" + b",".join(outputs_json) + b"]")
+    except MemoryQueueFull as e:
+        metrics.inc("errors_total", stage="memory_enqueue")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        metrics.inc("errors_total", stage="evaluate_batch")
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        mark_handler_end(request)
+
+
+@app.post("/evaluate/sensitivity", response_model=SensitivityOutput)
+def evaluate_sensitivity(req: SensitivityInput):
+    # What-if grid over the base opportunity; never logged to memory
+    from .sensitivity import evaluate_grid  # numpy: loaded on first use, not at startup
+
+    try:
+        with metrics.timed("sensitivity"):
+            return evaluate_grid(req)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/decisions")
+def list_decisions(
+    decision: Optional[Decision] = None,
+    client_level: Optional[ClientLevel] = None,
+    client_type: Optional[str] = None,
+    since: Optional[str] = Query(None, description="ISO-8601 UTC, inclusive"),
+    until: Optional[str] = Query(None, description="ISO-8601 UTC, exclusive"),
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    max_score: Optional[int] = Query(None, ge=0, le=100),
+    sort: str = Query("timestamp", pattern="^(timestamp|total_score)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    try:
+        q = DecisionQuery(
+            decision=decision, client_level=client_level, client_type=client_type,
+            since=since, until=until, min_score=min_score, max_score=max_score,
+            sort=sort, order=order, limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items, next_cursor = query_decisions(q)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@app.get("/stats")
+def decision_stats():
+    # Running aggregates (see app.stats): syncing reads only records appended
+    # since the last sync, e.g. by other workers or evaluate_leads.py
+    stats = get_stats()
+    stats.sync()
+    return stats.snapshot()
+
+
+@app.get("/policy")
+def current_policy():
+    policy = get_policy()
+    return {"fingerprint": policy.fingerprint, "settings": policy.settings}
+
+
+@app.post("/replay")
+def replay_history(req: ReplayInput):
+    # Re-scores the stored history under a candidate policy (see app.replay); nothing is written
+    from .replay import REPLAY_WORKERS, replay  # numpy: loaded on first use, not at startup
+
+    try:
+        policy = compile_policy(req.policy)
+        base_policy = compile_policy(req.base_policy) if req.base_policy is not None else None
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid policy: {e}")
+    with metrics.timed("replay"):
+        return replay(get_store(), policy, base_policy, req.since, req.until, workers=REPLAY_WORKERS, samples=req.samples)
+
 
-	 
-    
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
+@app.post("/debug/profile", response_class=PlainTextResponse)
+def profile(seconds: float = Query(10, gt=0, le=120), interval_ms: float = Query(5, ge=1, le=1000)):
+    """Samples all threads for N seconds; returns collapsed stacks for flamegraph.pl / speedscope."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled (set PROFILER_ENABLED=1).")
+    return PlainTextResponse(sample_profile(seconds, interval_ms / 1000))
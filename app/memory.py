@@ -1,24 +1,149 @@
+import atexit
 import json
 import os
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .similar import SimilarityIndex
+from .stats import DecisionStats
+from .storage import Appended, DecisionQuery, JsonlStore, Record, SqliteStore
 
 MEMORY_PATH = os.getenv("MEMORY_PATH", "memory/decisions.jsonl")
+# "jsonl" (default, append-only log) or "sqlite" (indexed, queryable)
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "jsonl")
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH", "memory/decisions.db")
+# JSONL rotation: seal the live file into a gzip segment past this size / age (0 = never)
+MEMORY_SEGMENT_MAX_BYTES = int(os.getenv("MEMORY_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+MEMORY_SEGMENT_MAX_AGE = float(os.getenv("MEMORY_SEGMENT_MAX_AGE", "0"))
+# Records per compressed block; the sparse index has one entry per block
+MEMORY_SEGMENT_BLOCK_RECORDS = int(os.getenv("MEMORY_SEGMENT_BLOCK_RECORDS", "1000"))
+# Records other processes wrote reach the stats / similarity index on GET /stats, or at most this often (seconds) on a write
+VIEWS_SYNC_INTERVAL = float(os.getenv("VIEWS_SYNC_INTERVAL", "5"))
+
+_store = None
+_stats: Optional[DecisionStats] = None
+_stats_lock = threading.Lock()
+_similar: Optional[SimilarityIndex] = None
+_similar_lock = threading.Lock()
+
+
+def open_store():
+    """New backend instance for MEMORY_BACKEND (callers own and close it)."""
+    if MEMORY_BACKEND == "jsonl":
+        return JsonlStore(
+            MEMORY_PATH,
+            max_bytes=MEMORY_SEGMENT_MAX_BYTES,
+            max_age=MEMORY_SEGMENT_MAX_AGE,
+            block_records=MEMORY_SEGMENT_BLOCK_RECORDS,
+        )
+    if MEMORY_BACKEND == "sqlite":
+        return SqliteStore(MEMORY_DB_PATH)
+    raise ValueError(f"Unknown MEMORY_BACKEND: {MEMORY_BACKEND!r}")
+
+
+def get_store():
+    """Shared backend instance used for reads."""
+    global _store
+    if _store is None:
+        _store = open_store()
+    return _store
+
+
+def get_stats() -> DecisionStats:
+    """
+    Process-wide running aggregates over the memory backend. The first call
+    loads the snapshot next to the store and catches it up with the log
+    (rebuilding it if it is missing or stale); it is saved again at exit.
+    """
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = DecisionStats(get_store())
+            _stats.sync()
+            atexit.register(_stats.save)
+        return _stats
+
+
+def get_similar_index() -> SimilarityIndex:
+    """
+    Process-wide similar-opportunity index over the memory backend (see
+    app.similar). The first call starts loading the snapshot and catching it
+    up with the log in the background; it is saved again at exit.
+    """
+    global _similar
+    with _similar_lock:
+        if _similar is None:
+            _similar = SimilarityIndex(get_store())
+            _similar.start_warm_up()
+            atexit.register(_similar.save)
+        return _similar
+
+
+def sync_views() -> None:
+    """Catches the stats and the similarity index up with records appended since their last sync."""
+    get_stats().sync()
+    get_similar_index().sync()
 
 
-def append_memory(record: Dict[str, Any]) -> None:
+def fold_views(records: Sequence[Record], appended: Optional[Appended]) -> None:
     """
-    Appends one JSON record per line to MEMORY_PATH.
+    Adds records this process just wrote (`appended` is the store's
+    last_append) to the stats and the similarity index as they are, without
+    reading the log back. A view that is missing other processes' records
+    catches up from the log at most every VIEWS_SYNC_INTERVAL seconds.
+    """
+    if appended is None:
+        sync_views()
+        return
+    after, ids = appended
+    items = list(zip(ids, (json.loads(r) if isinstance(r, bytes) else r for r in records)))
+    for view in (get_stats(), get_similar_index()):
+        view.fold(after, items)
+        if view.behind and time.monotonic() - view.synced_at >= VIEWS_SYNC_INTERVAL:
+            view.sync()
+
+
+def append_memory(record: Record) -> None:
+    """
+    Appends one record to the memory backend (one JSON line for JSONL).
     Safe for MVP; simple log-based memory.
     """
-    os.makedirs(os.path.dirname(MEMORY_PATH), exist_ok=True)
+    append_memory_many([record])
+
+
+def append_memory_many(records: Iterable[Record]) -> None:
+    """
+    Appends many records with a single open + write (used by batch evaluation).
+    """
+    records = list(records)
+    store = open_store()
+    try:
+        store.append_many(records)
+    finally:
+        store.close()
+    fold_views(records, store.last_append)
 
-    with open(MEMORY_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def query_decisions(q: DecisionQuery) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    return get_store().query(q)
+
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last timestamp; one tuple so threads swap it atomically
+_second_prefix: Tuple[int, str] = (-1, "")
 
 
 def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    """UTC ISO-8601 timestamp with microseconds; the date/time part is formatted once per second."""
+    global _second_prefix
+    now = time.time()
+    sec = int(now)
+    cached_sec, prefix = _second_prefix
+    if sec != cached_sec:
+        prefix = datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        _second_prefix = (sec, prefix)
+    return f"{prefix}.{int((now - sec) * 1e6):06d}+00:00"
 
 
 def build_record(opportunity: Any, decision_output: Any) -> Dict[str, Any]:
@@ -28,3 +153,15 @@ def build_record(opportunity: Any, decision_output: Any) -> Dict[str, Any]:
         "result": decision_output.model_dump(),
     }
 
+
+def encode_record(opportunity_json: bytes, result_json: bytes) -> bytes:
+    """
+    The same record as build_record, as one JSON line (without the newline)
+    spliced from already-encoded parts. Backends accept it in place of a dict.
+    """
+    return b"".join((
+        b'{"timestamp":"', now_iso().encode("ascii"),
+        b'","opportunity":', opportunity_json,
+        b',"result":', result_json, b"}",
+    ))
+
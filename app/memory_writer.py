@@ -0,0 +1,215 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Tuple
+
+from . import memory
+from .metrics import metrics
+from .storage import Record
+
+logger = logging.getLogger(__name__)
+
+MEMORY_WRITER_MAX_BATCH = int(os.getenv("MEMORY_WRITER_MAX_BATCH", "256"))
+MEMORY_WRITER_FLUSH_MS = float(os.getenv("MEMORY_WRITER_FLUSH_MS", "50"))
+MEMORY_WRITER_QUEUE_SIZE = int(os.getenv("MEMORY_WRITER_QUEUE_SIZE", "10000"))
+MEMORY_WRITER_PUT_TIMEOUT = float(os.getenv("MEMORY_WRITER_PUT_TIMEOUT", "1.0"))
+# "never": flush to the OS only, "batch": fsync after every group commit
+MEMORY_FSYNC = os.getenv("MEMORY_FSYNC", "never")
+
+_STOP = object()
+
+
+class MemoryQueueFull(RuntimeError):
+    """Raised when the writer queue stays full past the put timeout."""
+
+
+class MemoryWriter:
+    """
+    Background group-commit writer for the JSONL memory log.
+
+    Callers enqueue records; a single writer thread keeps the memory backend
+    open (see memory.open_store) and commits queued records in batches of up
+    to `max_batch`, or whatever arrived within `flush_ms` of the first one.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = MEMORY_WRITER_MAX_BATCH,
+        flush_ms: float = MEMORY_WRITER_FLUSH_MS,
+        queue_size: int = MEMORY_WRITER_QUEUE_SIZE,
+        put_timeout: float = MEMORY_WRITER_PUT_TIMEOUT,
+        fsync: str = MEMORY_FSYNC,
+    ):
+        if fsync not in ("never", "batch"):
+            raise ValueError(f"Unknown fsync policy: {fsync!r}")
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = max(0.0, flush_ms) / 1000
+        self.put_timeout = put_timeout
+        self.fsync = fsync
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._queued_records = 0  # a batch is one queue item but many records
+        self._count_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self) -> "MemoryWriter":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, record: Record, block: bool = True) -> None:
+        """
+        Enqueues one record. With block=False (event-loop callers) a full queue
+        raises MemoryQueueFull immediately instead of waiting up to put_timeout.
+        """
+        self._put([record], block)
+
+    def submit_many(self, records: Iterable[Record], block: bool = True) -> None:
+        # One queue item per batch keeps a batch request's records contiguous
+        records = list(records)
+        if records:
+            self._put(records, block)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def queued_records(self) -> int:
+        """Records enqueued but not written yet (queue_depth counts a batch once)."""
+        return self._queued_records
+
+    def _count(self, n: int) -> None:
+        with self._count_lock:
+            self._queued_records += n
+
+    def flush(self) -> None:
+        """Blocks until everything enqueued so far has been written."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drains the queue, writes the final batch and stops the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _put(self, records: List[Record], block: bool = True) -> None:
+        if self._closed:
+            raise RuntimeError("Memory writer is closed.")
+        try:
+            if block:
+                self._queue.put(records, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(records)
+        except queue.Full:
+            raise MemoryQueueFull("Memory log queue is full; try again later.") from None
+        self._count(len(records))
+
+    def _run(self) -> None:
+        store = memory.open_store()
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._collect()
+                if batch:
+                    self._commit(store, batch)
+                    self._count(-sum(map(len, batch)))
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+
+            # Late submits that raced with close()
+            leftover = self._drain_nowait()
+            if leftover:
+                self._commit(store, leftover)
+                self._count(-sum(map(len, leftover)))
+            for _ in leftover:
+                self._queue.task_done()
+        finally:
+            store.close()
+
+    def _drain_nowait(self) -> List[List[Record]]:
+        items: List[List[Record]] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is _STOP:
+                self._queue.task_done()
+            else:
+                items.append(item)
+
+    def _collect(self) -> Tuple[List[List[Record]], bool]:
+        batch: List[List[Record]] = []
+        item = self._queue.get()
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _commit(self, store, batch: List[List[Record]]) -> None:
+        records = [r for item in batch for r in item]
+        try:
+            with metrics.timed("memory_write"):
+                written = store.append_many(records, fsync=self.fsync == "batch")
+            metrics.inc("memory_write_bytes_total", written)
+            metrics.inc("memory_records_written_total", len(records))
+        except Exception:
+            metrics.inc("errors_total", stage="memory_write")
+            logger.exception("Failed to write %d memory records to %s", len(records), store.path)
+            return
+        try:
+            # Fold the committed records into /stats and the similar-opportunity index
+            with metrics.timed("views_fold"):
+                memory.fold_views(records, store.last_append)
+        except Exception:
+            metrics.inc("errors_total", stage="views_fold")
+            logger.exception("Failed to update decision stats / similarity index")
+
+
+_writer: Optional[MemoryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_memory_writer() -> MemoryWriter:
+    """Process-wide writer, started on first use and drained at exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer._closed:
+            _writer = MemoryWriter().start()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def enqueue_memory(record: Record, block: bool = True) -> None:
+    get_memory_writer().submit(record, block)
+
+
+def enqueue_memory_many(records: Iterable[Record], block: bool = True) -> None:
+    get_memory_writer().submit_many(records, block)
+
+
+def close_memory_writer(timeout: Optional[float] = None) -> None:
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
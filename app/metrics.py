@@ -0,0 +1,156 @@
+import bisect
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+PREFIX = "decision_agent"
+
+# Latency buckets (seconds): 50µs .. 5s
+BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated from the buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Process-local registry of per-stage latency histograms and labelled counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = Counter()
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Registers a gauge read at scrape time."""
+        self.gauges[name] = fn
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            stages = {k: (list(h.counts), h.sum, h.count, [h.quantile(q) for q in QUANTILES]) for k, h in self.stages.items()}
+            counters = dict(self.counters)
+
+        name = f"{PREFIX}_stage_latency_seconds"
+        lines.append(f"# HELP {name} Latency per evaluation stage.")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, (counts, total, count, _) in sorted(stages.items()):
+            cumulative = 0
+            for le, c in zip(BUCKETS, counts):
+                cumulative += c
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        qname = f"{PREFIX}_stage_latency_quantile_seconds"
+        lines.append(f"# HELP {qname} Estimated p50/p95/p99 latency per stage (from histogram buckets).")
+        lines.append(f"# TYPE {qname} gauge")
+        for stage, (_, _, _, qs) in sorted(stages.items()):
+            for q, v in zip(QUANTILES, qs):
+                lines.append(f'{qname}{{stage="{stage}",quantile="{q}"}} {v}')
+
+        seen = set()
+        for (cname, labels), value in sorted(counters.items()):
+            full = f"{PREFIX}_{cname}"
+            if full not in seen:
+                seen.add(full)
+                lines.append(f"# TYPE {full} counter")
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{full}{{{label_str}}} {value}" if label_str else f"{full} {value}")
+
+        for gname, fn in sorted(self.gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            full = f"{PREFIX}_{gname}"
+            lines.append(f"# TYPE {full} gauge")
+            lines.append(f"{full} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def sample_profile(seconds: float, interval: float = 0.005) -> str:
+    """
+    Samples every thread's stack for `seconds` and returns collapsed stacks
+    ("frame;frame;frame count" per line), ready for flamegraph.pl or speedscope.
+    """
+    own = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            frames.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(frames))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
@@ -1,8 +1,9 @@
-from typing import Literal, List
+from typing import Any, Dict, Literal, List, Optional
 from pydantic import BaseModel, Field, conint, confloat
 
 ClientLevel = Literal["sensitive", "high", "normal", "low"]
 Decision = Literal["ACCEPT", "REJECT", "NEEDS_INFO"]
+DecisionEngine = Literal["rules", "llm"]
 
 class OpportunityInput(BaseModel):
     opportunity_title: str = Field(..., min_length=3, max_length=120)
@@ -39,3 +40,54 @@ class DecisionOutput(BaseModel):
     risks: List[str] = Field(default_factory=list, max_length=7)
     next_actions: List[str] = Field(default_factory=list, max_length=7)
     score: ScoreBreakdown
+
+
+class SimilarOpportunity(BaseModel):
+    id: int  # memory record id, as in GET /decisions
+    timestamp: str
+    opportunity_title: str
+    client_level: str
+    decision: str
+    total_score: int
+    similarity: float  # estimated Jaccard similarity of title + description + risks words
+
+class EvaluateOutput(DecisionOutput):
+    similar: List[SimilarOpportunity] = []
+
+
+SensitivityField = Literal["cost_to_fulfill", "expected_earnings", "expected_time_days", "excitement_level"]
+
+class AxisRange(BaseModel):
+    # Either explicit values, or `steps` evenly spaced points from start to stop (inclusive)
+    values: Optional[List[float]] = Field(default=None, min_length=1, max_length=1000)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: conint(ge=1, le=1000) = 10
+
+class SensitivityInput(BaseModel):
+    base: OpportunityInput
+    ranges: Dict[SensitivityField, AxisRange] = Field(..., min_length=1, max_length=4)
+
+class SensitivityBoundary(BaseModel):
+    axis: SensitivityField
+    index: int  # flat index of the cell just before the flip along `axis`
+    at: Dict[str, float]
+    decision: Decision
+    next_decision: Decision
+
+class SensitivityOutput(BaseModel):
+    axes: Dict[str, List[float]]
+    shape: List[int]
+    decision_labels: List[Decision]
+    total_score: List[int]  # row-major over `axes`
+    decision: List[int]  # index into decision_labels, row-major
+    boundaries: List[SensitivityBoundary] = []
+
+class ReplayInput(BaseModel):
+    # Same keys as a POLICY_PATH file: overrides of app/config.py
+    policy: Dict[str, Any] = Field(default_factory=dict)
+    # Compare against a re-score under this policy instead of the stored decisions
+    base_policy: Optional[Dict[str, Any]] = None
+    since: Optional[str] = None  # ISO-8601 UTC, inclusive
+    until: Optional[str] = None  # ISO-8601 UTC, exclusive
+    samples: conint(ge=0, le=50) = 5
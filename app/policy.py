@@ -0,0 +1,245 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+from . import config
+from .keywords import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# Optional JSON file overriding app/config.py; re-read when its mtime changes
+POLICY_PATH = os.getenv("POLICY_PATH", "")
+POLICY_RELOAD_INTERVAL = float(os.getenv("POLICY_RELOAD_INTERVAL", "2"))
+
+# Lookup tables compiled ahead of time (`python -m app.policy`), keyed by settings fingerprint
+PRECOMPILED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy_tables.json")
+
+MAX_DAYS = 365
+MAX_EXCITEMENT = 10
+
+
+def _clamp_int(x: float, lo: int, hi: int) -> int:
+    return int(max(lo, min(hi, round(x))))
+
+
+def default_settings() -> Dict[str, Any]:
+    return {k: getattr(config, k) for k in dir(config) if k.isupper()}
+
+
+def settings_fingerprint(settings: Dict[str, Any]) -> str:
+    raw = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def build_tables(s: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Plain-list lookup tables for one set of settings (JSON-serializable, no numpy)."""
+    # ROI: roi <= edge[i] → points[i]; past the last edge → max points
+    roi_bands = sorted((float(e), int(p)) for e, p in s["ROI_BANDS"])
+
+    # Feasibility: [days][can_close] for days 0..MAX_DAYS
+    day_bands = sorted((int(d), int(p)) for d, p in s["FEASIBILITY_DAY_BANDS"])
+    day_edges = [d for d, _ in day_bands]
+    day_points = [p for _, p in day_bands] + [int(s["FEASIBILITY_LONG_POINTS"])]
+    feas_max = int(s["FEASIBILITY_MAX_POINTS"])
+    penalty = int(s["CANNOT_CLOSE_PENALTY"])
+    feasibility = []
+    for days in range(MAX_DAYS + 1):
+        time_points = day_points[bisect.bisect_left(day_edges, days)]
+        feasibility.append([_clamp_int(time_points - penalty, 0, feas_max), _clamp_int(time_points, 0, feas_max)])
+
+    # Motivation: excitement 0..MAX_EXCITEMENT
+    mot_max = int(s["MOTIVATION_MAX_POINTS"])
+    return {
+        "roi_edges": [e for e, _ in roi_bands],
+        "roi_points": [p for _, p in roi_bands] + [int(s["ROI_MAX_POINTS"])],
+        "feasibility": feasibility,
+        "motivation": [_clamp_int((e / MAX_EXCITEMENT) * mot_max, 0, mot_max) for e in range(MAX_EXCITEMENT + 1)],
+    }
+
+
+class Policy:
+    """
+    Scoring policy compiled into lookup tables. Instances are immutable once
+    built; reloading swaps in a new instance, so a request that holds one sees
+    a consistent policy end to end.
+    """
+
+    def __init__(self, settings: Dict[str, Any], tables: Optional[Dict[str, List[Any]]] = None):
+        s = dict(settings)
+        self.settings = s
+        self.fingerprint = settings_fingerprint(s)
+
+        self.accept_threshold = int(s["ACCEPT_THRESHOLD"])
+        self.reject_threshold = int(s["REJECT_THRESHOLD"])
+        self.conf_accept = int(s["CONF_ACCEPT"])
+        self.conf_needs_info = int(s["CONF_NEEDS_INFO"])
+        self.conf_reject = int(s["CONF_REJECT"])
+
+        t = tables or build_tables(s)
+        self.roi_edges: List[float] = t["roi_edges"]
+        self.roi_points: List[int] = t["roi_points"]
+        self._feasibility_rows: List[List[int]] = t["feasibility"]
+        self._motivation_list: List[int] = t["motivation"]
+
+        # Risk
+        self.risk_base = int(s["RISK_BASE_POINTS"])
+        self.risk_max = int(s["RISK_MAX_POINTS"])
+        self.client_level_risk: Dict[str, int] = {k: int(v) for k, v in s["CLIENT_LEVEL_RISK"].items()}
+        self.matcher = KeywordMatcher({k.lower(): int(v) for k, v in s["RISK_KEYWORDS"].items()})
+
+    # Array views for the vectorized paths; numpy is only imported on first use
+
+    @cached_property
+    def roi_edges_array(self):
+        import numpy as np
+        return np.array(self.roi_edges, dtype=np.float64)
+
+    @cached_property
+    def roi_points_array(self):
+        import numpy as np
+        return np.array(self.roi_points, dtype=np.int64)
+
+    @cached_property
+    def feasibility_table(self):
+        """[days, can_close] for days 0..MAX_DAYS."""
+        import numpy as np
+        return np.array(self._feasibility_rows, dtype=np.int64)
+
+    @cached_property
+    def motivation_table(self):
+        import numpy as np
+        return np.array(self._motivation_list, dtype=np.int64)
+
+    # Scalar lookups -----------------------------------------------------
+
+    def roi_points_for(self, roi: float) -> int:
+        return self.roi_points[bisect.bisect_left(self.roi_edges, roi)]
+
+    def feasibility_points_for(self, expected_time_days: int, can_close: bool) -> int:
+        days = min(max(int(expected_time_days), 0), MAX_DAYS)
+        return self._feasibility_rows[days][1 if can_close else 0]
+
+    def motivation_points_for(self, excitement_level: int) -> int:
+        return self._motivation_list[min(max(int(excitement_level), 0), MAX_EXCITEMENT)]
+
+    def client_level_modifier(self, level: str) -> int:
+        return self.client_level_risk.get(level, 0)
+
+    def risk_points_for(self, penalties: int, client_level: str) -> int:
+        return _clamp_int(self.risk_base - penalties + self.client_level_modifier(client_level), 0, self.risk_max)
+
+    def decision_for(self, total_score: int):
+        if total_score > self.accept_threshold:
+            return "ACCEPT", self.conf_accept
+        if total_score < self.reject_threshold:
+            return "REJECT", self.conf_reject
+        return "NEEDS_INFO", self.conf_needs_info
+
+
+def compile_policy(overrides: Optional[Dict[str, Any]] = None) -> Policy:
+    settings = default_settings()
+    unknown = set(overrides or {}) - set(settings)
+    if unknown:
+        raise ValueError(f"Unknown policy keys: {', '.join(sorted(unknown))}")
+    settings.update(overrides or {})
+    return Policy(settings, _precompiled_tables().get(settings_fingerprint(settings)))
+
+
+_precompiled: Optional[Dict[str, Dict[str, List[Any]]]] = None
+
+
+def _precompiled_tables() -> Dict[str, Dict[str, List[Any]]]:
+    global _precompiled
+    if _precompiled is None:
+        try:
+            with open(PRECOMPILED_PATH, "r", encoding="utf-8") as f:
+                _precompiled = json.load(f)
+        except (OSError, ValueError):
+            _precompiled = {}
+    return _precompiled
+
+
+def precompile(path: str = PRECOMPILED_PATH) -> List[str]:
+    """
+    Build step: writes the lookup tables of the default policy (and of
+    POLICY_PATH, if set) so workers load them instead of computing them.
+    Returns the fingerprints written. Stale entries are simply never matched.
+    """
+    settings = [default_settings()]
+    if POLICY_PATH and os.path.exists(POLICY_PATH):
+        with open(POLICY_PATH, "r", encoding="utf-8") as f:
+            settings.append(dict(settings[0], **json.load(f)))
+    tables = {settings_fingerprint(s): build_tables(s) for s in settings}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(tables, f)
+    os.replace(tmp, path)
+    return list(tables)
+
+
+def load_policy_file(path: str) -> Policy:
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_policy(json.load(f))
+
+
+_policy = compile_policy()
+_policy_mtime: Optional[int] = None
+_next_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def get_policy() -> Policy:
+    """Current policy; checks POLICY_PATH for changes at most every POLICY_RELOAD_INTERVAL seconds."""
+    global _next_check
+    if POLICY_PATH and time.monotonic() >= _next_check and _reload_lock.acquire(blocking=False):
+        try:
+            _next_check = time.monotonic() + POLICY_RELOAD_INTERVAL
+            _reload_if_changed(POLICY_PATH)
+        finally:
+            _reload_lock.release()
+    return _policy
+
+
+def set_policy(policy: Policy) -> None:
+    global _policy
+    _policy = policy  # single reference swap: readers see the old or the new policy, never a mix
+
+
+def reload_policy(path: Optional[str] = None) -> Policy:
+    """Recompiles from config.py plus the policy file (if any) and swaps it in."""
+    global _policy_mtime
+    path = path if path is not None else POLICY_PATH
+    if path:
+        _policy_mtime = os.stat(path).st_mtime_ns
+        set_policy(load_policy_file(path))
+    else:
+        set_policy(compile_policy())
+    return _policy
+
+
+def _reload_if_changed(path: str) -> None:
+    global _policy_mtime
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return
+    if mtime == _policy_mtime:
+        return
+    try:
+        reload_policy(path)
+        logger.info("Reloaded scoring policy from %s (%s)", path, _policy.fingerprint)
+    except Exception:
+        # Keep serving the previous policy; don't retry until the file changes again
+        _policy_mtime = mtime
+        logger.exception("Invalid policy file %s; keeping previous policy", path)
+
+
+if __name__ == "__main__":
+    written = precompile()
+    print(f"✅ Precompiled {len(written)} policy table set(s) to: {PRECOMPILED_PATH}")
@@ -0,0 +1,265 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .batch_scoring import DECISION_LABELS, decision_codes_array, score_arrays
+from .policy import Policy, compile_policy, get_policy, settings_fingerprint
+from .storage import read_span
+
+# Worker processes for POST /replay (1 = in the request thread; the CLI defaults to all CPUs)
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", "1"))
+# Records per work unit
+REPLAY_SPAN_RECORDS = int(os.getenv("REPLAY_SPAN_RECORDS", "20000"))
+REPLAY_SAMPLES = 5
+
+_CODES = {label: i for i, label in enumerate(DECISION_LABELS)}
+_N = len(DECISION_LABELS)
+_PAIRS = _N * _N  # flip matrix cells: before * _N + after
+MAX_SCORE = 100
+
+
+def pair_label(pair: int) -> str:
+    return f"{DECISION_LABELS[pair // _N]}->{DECISION_LABELS[pair % _N]}"
+
+
+_policies: Dict[str, Policy] = {}
+
+
+def _compiled(settings: Dict[str, Any]) -> Policy:
+    # Workers get plain settings (cheap to pickle) and compile each policy once
+    key = settings_fingerprint(settings)
+    policy = _policies.get(key)
+    if policy is None:
+        policy = _policies[key] = compile_policy(settings)
+    return policy
+
+
+def _total_scores(
+    policy: Policy, cols: Dict[str, np.ndarray], risks: Tuple[str, ...], level_ids: np.ndarray, levels: List[str]
+) -> np.ndarray:
+    # Keyword matching is the only per-record Python work left; risk texts repeat, so match each once
+    penalty = {t: policy.matcher.penalty(policy.matcher.find(t)) for t in set(risks)}
+    modifiers = np.array([policy.client_level_modifier(level) for level in levels], dtype=np.int64)
+    return score_arrays(
+        penalties=np.array([penalty[t] for t in risks], dtype=np.int64),
+        client_modifier=modifiers[level_ids],
+        policy=policy,
+        **cols,
+    )["total_score"]
+
+
+def replay_span(task: Tuple[Any, ...]) -> Dict[str, Any]:
+    """
+    Runs in a worker: reads one span of the store, re-scores it and returns
+    its share of the diff (counts only, plus a few sample records).
+
+    Stored records were validated when they were written, so they are not
+    re-validated through OpportunityInput: the scoring fields are read straight
+    from the JSON, and records missing any of them are counted as skipped.
+    """
+    span, settings, base_settings, since, until, samples = task
+    rows, meta, skipped = [], [], 0
+    for row_id, rec in read_span(span):
+        ts = rec.get("timestamp") or ""
+        if (since and ts < since) or (until and ts >= until):
+            continue
+        opp = rec.get("opportunity")
+        res = rec.get("result") or rec.get("decision") or {}
+        try:
+            rows.append((
+                float(opp["cost_to_fulfill"]),
+                float(opp["expected_earnings"]),
+                int(opp["expected_time_days"]),
+                bool(opp["can_close_within_timeframe"]),
+                int(opp["excitement_level"]),
+                opp.get("risks_and_concerns") or "",
+                opp.get("client_level") or "unknown",
+                _CODES[res["decision"]],
+                int(res["score"]["total_score"]),
+            ))
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+            continue
+        meta.append((row_id, ts, opp.get("opportunity_title", "")))
+
+    part: Dict[str, Any] = {"records": len(rows), "skipped": skipped, "pairs": [0] * _PAIRS, "levels": {}, "deltas": [], "samples": {}}
+    if not rows:
+        return part
+
+    cost, earnings, days, can_close, excitement, risks, level_names, before, before_total = zip(*rows)
+    cols = {
+        "cost": np.array(cost, dtype=np.float64),
+        "earnings": np.array(earnings, dtype=np.float64),
+        "expected_time_days": np.array(days, dtype=np.int64),
+        "can_close": np.array(can_close, dtype=bool),
+        "excitement_level": np.array(excitement, dtype=np.int64),
+    }
+    index: Dict[str, int] = {}
+    level_ids = np.array([index.setdefault(name, len(index)) for name in level_names], dtype=np.int64)
+    levels = list(index)
+
+    policy = _compiled(settings)
+    after_total = _total_scores(policy, cols, risks, level_ids, levels)
+    after = decision_codes_array(after_total, policy).astype(np.int64)
+    if base_settings is None:
+        before_total = np.array(before_total, dtype=np.int64)
+        before = np.array(before, dtype=np.int64)
+    else:
+        base = _compiled(base_settings)
+        before_total = _total_scores(base, cols, risks, level_ids, levels)
+        before = decision_codes_array(before_total, base).astype(np.int64)
+
+    pairs = before * _N + after
+    by_level = np.bincount(level_ids * _PAIRS + pairs, minlength=len(levels) * _PAIRS).reshape(len(levels), _PAIRS)
+    delta = np.clip(after_total - before_total, -MAX_SCORE, MAX_SCORE)
+    part["pairs"] = np.bincount(pairs, minlength=_PAIRS).tolist()
+    part["levels"] = {name: by_level[i].tolist() for i, name in enumerate(levels)}
+    part["deltas"] = np.bincount(delta + MAX_SCORE, minlength=2 * MAX_SCORE + 1).tolist()
+
+    for pair in np.unique(pairs[before != after]).tolist():
+        part["samples"][pair] = [
+            {
+                "id": meta[i][0],
+                "timestamp": meta[i][1],
+                "opportunity_title": meta[i][2],
+                "client_level": level_names[i],
+                "decision_before": DECISION_LABELS[before[i]],
+                "decision_after": DECISION_LABELS[after[i]],
+                "total_score_before": int(before_total[i]),
+                "total_score_after": int(after_total[i]),
+            }
+            for i in np.flatnonzero(pairs == pair)[:samples].tolist()
+        ]
+    return part
+
+
+class ReplayDiff:
+    """Running sum of replay_span() results, in log order (samples are the earliest records)."""
+
+    def __init__(self, samples: int = REPLAY_SAMPLES):
+        self.samples = samples
+        self.records = 0
+        self.skipped = 0
+        self.pairs = np.zeros(_PAIRS, dtype=np.int64)
+        self.levels: Dict[str, np.ndarray] = {}
+        self.deltas = np.zeros(2 * MAX_SCORE + 1, dtype=np.int64)
+        self.examples: Dict[int, List[Dict[str, Any]]] = {}
+
+    def add(self, part: Dict[str, Any]) -> None:
+        self.records += part["records"]
+        self.skipped += part["skipped"]
+        if not part["records"]:
+            return
+        self.pairs += part["pairs"]
+        for name, counts in part["levels"].items():
+            self.levels[name] = self.levels.get(name, 0) + np.array(counts, dtype=np.int64)
+        self.deltas += part["deltas"]
+        for pair, items in part["samples"].items():
+            kept = self.examples.setdefault(pair, [])
+            kept.extend(items[:self.samples - len(kept)])
+
+    def report(self) -> Dict[str, Any]:
+        n = self.records
+        values = np.arange(-MAX_SCORE, MAX_SCORE + 1)
+        present = np.flatnonzero(self.deltas)
+        matrix = self.pairs.reshape(_N, _N)
+        return {
+            "records": n,
+            "skipped": self.skipped,
+            "flipped": _flipped(self.pairs),
+            "flip_rate": _flipped(self.pairs) / n if n else None,
+            "decisions": {
+                "before": dict(zip(DECISION_LABELS, matrix.sum(axis=1).tolist())),
+                "after": dict(zip(DECISION_LABELS, matrix.sum(axis=0).tolist())),
+            },
+            "flips": _flips(self.pairs),
+            "by_client_level": {
+                name: {"records": int(counts.sum()), "flipped": _flipped(counts), "flips": _flips(counts)}
+                for name, counts in sorted(self.levels.items())
+            },
+            "score_delta": {
+                "changed": int(n - self.deltas[MAX_SCORE]),
+                "mean": float(self.deltas @ values) / n if n else None,
+                "mean_abs": float(self.deltas @ np.abs(values)) / n if n else None,
+                "min": int(values[present[0]]) if len(present) else None,
+                "max": int(values[present[-1]]) if len(present) else None,
+                "histogram": {str(int(values[i])): int(self.deltas[i]) for i in present},
+            },
+            "samples": {pair_label(pair): items for pair, items in sorted(self.examples.items())},
+        }
+
+
+def _flipped(pairs: np.ndarray) -> int:
+    return int(pairs.sum() - pairs[::_N + 1].sum())  # off the diagonal
+
+
+def _flips(pairs: np.ndarray) -> Dict[str, int]:
+    cells = [(int(pairs[p]), p) for p in range(_PAIRS) if p // _N != p % _N and pairs[p]]
+    return {pair_label(p): count for count, p in sorted(cells, key=lambda c: (-c[0], c[1]))}
+
+
+def setting_changes(policy: Policy, base: Policy) -> Dict[str, Dict[str, Any]]:
+    return {
+        k: {"before": base.settings.get(k), "after": v}
+        for k, v in sorted(policy.settings.items())
+        if base.settings.get(k) != v
+    }
+
+
+def replay(
+    store,
+    policy: Policy,
+    base_policy: Optional[Policy] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    workers: int = REPLAY_WORKERS,
+    span_records: int = REPLAY_SPAN_RECORDS,
+    samples: int = REPLAY_SAMPLES,
+) -> Dict[str, Any]:
+    """
+    Re-scores every stored decision (within `since`/`until`) under `policy`
+    and reports what would change: flips per decision pair and client_level,
+    total_score deltas and sample records. The baseline is the stored decision
+    and score, or a re-score under `base_policy` if given. Nothing is written.
+
+    The store is split into spans (see read_plan()) that workers read, parse
+    and score on their own, one vectorized pass per span; only the counts come
+    back, so the parent never touches a record.
+    """
+    t0 = time.perf_counter()
+    base_settings = base_policy.settings if base_policy is not None else None
+    tasks = (
+        (span, policy.settings, base_settings, since, until, samples)
+        for span in store.read_plan(0, since, until, span_records)
+    )
+
+    diff = ReplayDiff(samples)
+    if workers <= 1:
+        for task in tasks:
+            diff.add(replay_span(task))
+    else:
+        # Bounded window of in-flight spans, merged in log order
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(replay_span, task))
+                if len(pending) >= workers * 2:
+                    diff.add(pending.popleft().result())
+            while pending:
+                diff.add(pending.popleft().result())
+
+    elapsed = time.perf_counter() - t0
+    base = base_policy or get_policy()
+    return dict(
+        policy={"fingerprint": policy.fingerprint, "changes": setting_changes(policy, base)},
+        baseline="stored" if base_policy is None else {"fingerprint": base_policy.fingerprint},
+        since=since,
+        until=until,
+        **diff.report(),
+        elapsed_s=round(elapsed, 3),
+        records_per_s=round(diff.records / elapsed) if elapsed > 0 else None,
+    )
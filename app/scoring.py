@@ -1,5 +1,6 @@
-from typing import List
+from typing import List, Optional
 from .models import OpportunityInput, ScoreBreakdown
+from .policy import Policy, get_policy
 
 def clamp_int(x: float, lo: int, hi: int) -> int:
     return int(max(lo, min(hi, round(x))))
@@ -9,46 +10,34 @@ def compute_roi(cost: float, earnings: float) -> float:
         return 10.0 if earnings > 0 else 0.0
     return (earnings - cost) / cost
 
-def roi_to_score(roi: float) -> int:
-    if roi <= -0.25: return 0
-    if roi <= 0: return 8
-    if roi <= 0.5: return 16
-    if roi <= 1.0: return 22
-    if roi <= 2.0: return 27
-    return 30
+def roi_to_score(roi: float, policy: Optional[Policy] = None) -> int:
+    return (policy or get_policy()).roi_points_for(roi)
 
-def feasibility_to_score(expected_time_days: int, can_close: bool) -> int:
-    time_score = 25
-    if expected_time_days > 120: time_score = 10
-    elif expected_time_days > 60: time_score = 16
-    elif expected_time_days > 30: time_score = 20
-    elif expected_time_days > 14: time_score = 22
-    close_bonus = 0 if can_close else -8
-    return clamp_int(time_score + close_bonus, 0, 25)
+def feasibility_to_score(expected_time_days: int, can_close: bool, policy: Optional[Policy] = None) -> int:
+    return (policy or get_policy()).feasibility_points_for(expected_time_days, can_close)
 
-def client_level_risk_modifier(level: str) -> int:
-    return {"sensitive": -12, "high": -7, "normal": 0, "low": 3}.get(level, 0)
+def client_level_risk_modifier(level: str, policy: Optional[Policy] = None) -> int:
+    return (policy or get_policy()).client_level_modifier(level)
 
-def risk_to_score(risks_text: str, client_level: str) -> int:
-    base = 20
-    t = (risks_text or "").lower()
-    penalties = 0
-    keywords = {
-        "scope": 4, "unclear": 4, "urgent": 3, "deadline": 3,
-        "legal": 6, "refund": 5, "complaint": 4, "chargeback": 6,
-        "security": 5, "integration": 3, "api": 2, "unknown": 3,
-        "no budget": 7, "delay": 3,
-    }
-    for k, p in keywords.items():
-        if k in t:
-            penalties += p
-    score = base - penalties + client_level_risk_modifier(client_level)
-    return clamp_int(score, 0, 25)
+def risk_penalties(risks_text: str, policy: Optional[Policy] = None) -> int:
+    matcher = (policy or get_policy()).matcher
+    return matcher.penalty(matcher.find(risks_text))
 
-def motivation_to_score(excitement_level: int) -> int:
-    return clamp_int((excitement_level / 10) * 20, 0, 20)
+def risk_to_score(
+    risks_text: str,
+    client_level: str,
+    matched: Optional[List[str]] = None,
+    policy: Optional[Policy] = None,
+) -> int:
+    policy = policy or get_policy()
+    if matched is None:
+        matched = policy.matcher.find(risks_text)
+    return policy.risk_points_for(policy.matcher.penalty(matched), client_level)
 
-def red_flags(inp: OpportunityInput, roi: float) -> List[str]:
+def motivation_to_score(excitement_level: int, policy: Optional[Policy] = None) -> int:
+    return (policy or get_policy()).motivation_points_for(excitement_level)
+
+def red_flags(inp: OpportunityInput, roi: float, matched_keywords: Optional[List[str]] = None) -> List[str]:
     flags = []
     if roi < 0:
         flags.append("Negative ROI (loss expected).")
@@ -60,14 +49,19 @@ def red_flags(inp: OpportunityInput, roi: float) -> List[str]:
         flags.append("Very long expected time (>120 days).")
     if inp.cost_to_fulfill == 0 and inp.expected_earnings > 0:
         flags.append("Cost is 0 with positive earnings (confirm cost is truly zero).")
+    if matched_keywords:
+        flags.append(f"Risk keywords in concerns: {', '.join(matched_keywords)}.")
     return flags
 
-def score_opportunity(inp: OpportunityInput) -> ScoreBreakdown:
+def score_opportunity(inp: OpportunityInput, policy: Optional[Policy] = None) -> ScoreBreakdown:
+    # One policy snapshot for the whole evaluation, even if a reload happens mid-way
+    policy = policy or get_policy()
     roi = compute_roi(inp.cost_to_fulfill, inp.expected_earnings)
-    roi_score = roi_to_score(roi)  # 0..30
-    feasibility_score = feasibility_to_score(inp.expected_time_days, inp.can_close_within_timeframe)  # 0..25
-    risk_score = risk_to_score(inp.risks_and_concerns, inp.client_level)  # 0..25
-    motivation_score = motivation_to_score(inp.excitement_level)  # 0..20
+    roi_score = policy.roi_points_for(roi)  # 0..30
+    feasibility_score = policy.feasibility_points_for(inp.expected_time_days, inp.can_close_within_timeframe)  # 0..25
+    matched = policy.matcher.find(inp.risks_and_concerns)
+    risk_score = policy.risk_points_for(policy.matcher.penalty(matched), inp.client_level)  # 0..25
+    motivation_score = policy.motivation_points_for(inp.excitement_level)  # 0..20
     total = roi_score + feasibility_score + risk_score + motivation_score  # 0..100
 
     return ScoreBreakdown(
@@ -77,5 +71,5 @@ def score_opportunity(inp: OpportunityInput) -> ScoreBreakdown:
         risk_score=risk_score,
         motivation_score=motivation_score,
         total_score=clamp_int(total, 0, 100),
-        red_flags=red_flags(inp, roi),
+        red_flags=red_flags(inp, roi, matched),
     )
@@ -0,0 +1,470 @@
+import fcntl
+import gzip
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# The live log (MEMORY_PATH) is rotated into numbered segments under
+# `<root>.segments/`. Sealed segments are gzip files written as one gzip member
+# per block of `block_records` records, so a reader can seek to any block and
+# decompress only that block. `index.json` records, per segment and per block,
+# the time range, record count and byte offsets.
+#
+# Readers address the whole history with *global* offsets: byte positions in
+# the uncompressed concatenation of all segments followed by the live file.
+# Global offsets survive rotation, so checkpoints, compaction and imports that
+# remember an offset keep working.
+
+INDEX_NAME = "index.json"
+LOCK_NAME = ".lock"
+SEAL_LOCK_NAME = ".seal.lock"
+DEFAULT_BLOCK_RECORDS = 1000
+DEFAULT_SPAN_RECORDS = 20000
+COMPRESS_LEVEL = 6
+_RETRIES = 5
+
+
+class _Rotated(Exception):
+    """The live file was rotated while a reader was resolving it."""
+
+
+def default_segments_dir(path: str) -> str:
+    root, _ = os.path.splitext(path)
+    return root + ".segments"
+
+
+def parse_lines(data: bytes, end: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yields (end_offset, record) for each complete line in `data`, which starts at offset `end`."""
+    for raw in data.splitlines(keepends=True):
+        if not raw.endswith(b"\n"):
+            break
+        end += len(raw)
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield end, json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def _overlaps(lo: Optional[str], hi: Optional[str], since: Optional[str], until: Optional[str]) -> bool:
+    # Unknown ranges (e.g. an unsealed segment) always overlap
+    if since and hi is not None and hi < since:
+        return False
+    if until and lo is not None and lo >= until:
+        return False
+    return True
+
+
+class SegmentedLog:
+    """Read view (plus rotation) of one memory log: sealed segments, then the live file."""
+
+    def __init__(self, path: str, segments_dir: Optional[str] = None, block_records: int = DEFAULT_BLOCK_RECORDS):
+        self.path = path
+        self.segments_dir = segments_dir or default_segments_dir(path)
+        self.block_records = max(1, block_records)
+        self.refresh()
+
+    # Index ----------------------------------------------------------------
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.segments_dir, INDEX_NAME)
+
+    @property
+    def lock_path(self) -> str:
+        # Appenders hold this shared; rotation and the end of sealing hold it exclusive
+        return os.path.join(self.segments_dir, LOCK_NAME)
+
+    @property
+    def seal_lock_path(self) -> str:
+        # Held by whoever is compressing the pending segment
+        return os.path.join(self.segments_dir, SEAL_LOCK_NAME)
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.segments_dir, name)
+
+    def _read_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp, self.index_path)
+        self.refresh()
+
+    def refresh(self) -> None:
+        index = self._read_index()
+        while True:
+            segments = list(index.get("segments", []))
+            active_base = index.get("active_base", 0)
+            pending = index.get("pending")
+            if not pending:
+                break
+            # A pending segment becomes part of the log the moment the live file is renamed to it
+            if os.path.exists(self._segment_path(pending["name"])):
+                segments.append(pending)
+                active_base = pending["start"] + pending["length"]
+                break
+            # Missing raw file: either not renamed yet, or already sealed and removed.
+            # Only an unchanged index tells the two apart.
+            again = self._read_index()
+            if again == index:
+                break
+            index = again
+        self.index = index
+        self.segments: List[Dict[str, Any]] = segments
+        self.active_base: int = active_base
+
+    @property
+    def end_offset(self) -> int:
+        try:
+            return self.active_base + os.path.getsize(self.path)
+        except FileNotFoundError:
+            return self.active_base
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.segments) or os.path.exists(self.path)
+
+    # Reading --------------------------------------------------------------
+
+    def iter_from(
+        self, offset: int = 0, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yields (global end offset, record) for every complete record ending after
+        `offset`. With `since`/`until` (ISO timestamps), segments and blocks whose
+        time range lies outside are skipped without being read; records inside
+        the remaining blocks are not filtered, so callers still check timestamps.
+        A trailing line without a newline is still being written and is skipped.
+        """
+        for attempt in range(_RETRIES):
+            try:
+                for end, rec in self._iter_once(offset, since, until):
+                    offset = end
+                    yield end, rec
+                return
+            except (FileNotFoundError, _Rotated):
+                # A segment was sealed or the live file rotated underneath us
+                if attempt == _RETRIES - 1:
+                    raise
+                self.refresh()
+
+    def _iter_once(self, offset: int, since: Optional[str], until: Optional[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for seg in self.segments:
+            if seg["start"] + seg["length"] <= offset or not _overlaps(seg.get("first_ts"), seg.get("last_ts"), since, until):
+                continue
+            with open(self._segment_path(seg["name"]), "rb") as f:
+                for block in seg.get("blocks") or [{"offset": 0, "length": seg["length"]}]:
+                    start = seg["start"] + block["offset"]
+                    if start + block["length"] <= offset or not _overlaps(block.get("first_ts"), block.get("last_ts"), since, until):
+                        continue
+                    if "compressed_offset" in block:
+                        f.seek(block["compressed_offset"])
+                        data = gzip.decompress(f.read(block["compressed_length"]))
+                    else:
+                        f.seek(block["offset"])
+                        data = f.read(block["length"])
+                    for end, rec in parse_lines(data, start):
+                        if end > offset:
+                            yield end, rec
+
+        state = (self.active_base, len(self.segments))
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            # The handle must belong to the same live file the index describes
+            self.refresh()
+            if (self.active_base, len(self.segments)) != state:
+                raise _Rotated()
+            local = max(0, offset - self.active_base)
+            f.seek(local)
+            end = self.active_base + local
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                end += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    yield end, json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    # Parallel reading -----------------------------------------------------
+
+    def read_plan(
+        self,
+        offset: int = 0,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        span_records: int = DEFAULT_SPAN_RECORDS,
+    ) -> List[Dict[str, Any]]:
+        """
+        Splits the records ending after `offset` into spans of about
+        `span_records` records, in log order, that read_span() reads on its
+        own (e.g. in a worker process). Sealed segments split at block
+        boundaries, raw files at line boundaries; segments and blocks outside
+        `since`/`until` are left out, but records are not filtered.
+        """
+        for attempt in range(_RETRIES):
+            try:
+                return self._plan_once(offset, since, until, max(1, span_records))
+            except (FileNotFoundError, _Rotated):
+                if attempt == _RETRIES - 1:
+                    raise
+                self.refresh()
+        return []
+
+    def _plan_once(self, offset: int, since: Optional[str], until: Optional[str], span_records: int) -> List[Dict[str, Any]]:
+        sealed = [s for s in self.segments if s.get("records")]
+        record_bytes = sum(s["length"] for s in sealed) // max(1, sum(s["records"] for s in sealed)) or 1024
+        span_bytes = span_records * record_bytes
+        spans: List[Dict[str, Any]] = []
+
+        for seg in self.segments:
+            if seg["start"] + seg["length"] <= offset or not _overlaps(seg.get("first_ts"), seg.get("last_ts"), since, until):
+                continue
+            path = self._segment_path(seg["name"])
+            if not seg.get("blocks"):
+                # Pending: the raw live file renamed, not compressed yet
+                spans += self._raw_spans(path, seg["start"], offset, seg["start"] + seg["length"], span_bytes, None)
+                continue
+            span: Optional[Dict[str, Any]] = None
+            for block in seg["blocks"]:
+                start = seg["start"] + block["offset"]
+                if start + block["length"] <= offset or not _overlaps(block.get("first_ts"), block.get("last_ts"), since, until):
+                    span = None  # spans are runs of adjacent blocks
+                    continue
+                if span is None or span["records"] >= span_records:
+                    span = {
+                        "log": self.path, "segments_dir": self.segments_dir, "file": path,
+                        "start": start, "length": 0, "after": offset, "records": 0,
+                        "compressed_offset": block["compressed_offset"], "compressed_length": 0,
+                    }
+                    spans.append(span)
+                span["length"] += block["length"]
+                span["records"] += block["records"]
+                span["compressed_length"] += block["compressed_length"]
+
+        state = (self.active_base, len(self.segments))
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return spans
+        with f:
+            st = os.fstat(f.fileno())
+            self.refresh()
+            if (self.active_base, len(self.segments)) != state:
+                raise _Rotated()
+        end = self.active_base + st.st_size
+        return spans + self._raw_spans(self.path, self.active_base, offset, end, span_bytes, st.st_ino)
+
+    def _raw_spans(
+        self, path: str, base: int, offset: int, end: int, span_bytes: int, inode: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        # `offset` is always a record end (ids are), so it is a line start too
+        spans: List[Dict[str, Any]] = []
+        pos = max(offset, base)
+        with open(path, "rb") as f:
+            while pos < end:
+                cut = pos + span_bytes
+                if cut < end:
+                    f.seek(cut - base)
+                    cut += len(f.readline())  # finish the line the cut falls in
+                cut = min(cut, end)
+                spans.append({
+                    "log": self.path, "segments_dir": self.segments_dir, "file": path,
+                    "start": pos, "length": cut - pos, "after": offset, "offset": pos - base, "inode": inode,
+                })
+                pos = cut
+        return spans
+
+    # Rotation -------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        os.makedirs(self.segments_dir, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def active_started(self) -> float:
+        """Epoch seconds when the live file was started (recorded on first use)."""
+        started = self.index.get("active_started")
+        if started is None:
+            with self._locked():
+                started = self.index.get("active_started")
+                if started is None:
+                    started = time.time()
+                    self._write_index(dict(self.index, active_started=started))
+        return started
+
+    def rotate(self, inode: Optional[int] = None) -> Optional[str]:
+        """
+        Renames the live file into a new pending segment and returns its name.
+        Does nothing if the live file is empty, missing, or (when `inode` is
+        given) no longer that file because someone else rotated it first, nor
+        while the previous pending segment is still unsealed: the live file
+        just grows a little past the limit until seal_pending() catches up.
+        The segment is readable right away; seal_pending() compresses it.
+        """
+        with self._locked():
+            if self.index.get("pending"):
+                return None
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return None
+            if st.st_size == 0 or (inode is not None and st.st_ino != inode):
+                return None
+
+            seq = self.index.get("next_seq", len(self.segments) + 1)
+            pending = {"name": f"seg-{seq:06d}.jsonl", "start": self.active_base, "length": st.st_size}
+            # Announce first, then rename: readers switch over atomically at the rename
+            self._write_index(dict(self.index, pending=pending, next_seq=seq + 1, active_started=time.time()))
+            os.rename(self.path, self._segment_path(pending["name"]))
+            self.refresh()
+            return pending["name"]
+
+    def seal_pending(self) -> None:
+        """
+        Compresses and indexes the pending segment, if any. Nothing writes to a
+        renamed segment, so it is compressed without the rotation lock (one
+        sealer at a time, under its own lock); appenders only wait for the
+        final rename and index swap.
+        """
+        os.makedirs(self.segments_dir, exist_ok=True)
+        with open(self.seal_lock_path, "a") as seal_lock:
+            fcntl.flock(seal_lock, fcntl.LOCK_EX)
+            try:
+                self._seal_pending()
+            finally:
+                fcntl.flock(seal_lock, fcntl.LOCK_UN)
+
+    def _seal_pending(self) -> None:
+        self.refresh()
+        pending = self.index.get("pending")
+        if not pending:
+            return
+        raw_path = self._segment_path(pending["name"])
+        if not os.path.exists(raw_path):
+            with self._locked():
+                pending = self.index.get("pending")
+                if pending and not os.path.exists(self._segment_path(pending["name"])):
+                    # Crashed before the rename: the records are still in the live file
+                    self._write_index({k: v for k, v in self.index.items() if k != "pending"})
+            return
+
+        name = pending["name"] + ".gz"
+        tmp = self._segment_path(name + ".tmp")
+        blocks = self._compress(raw_path, pending["length"], tmp)
+        firsts = [b["first_ts"] for b in blocks if b["first_ts"]]
+        lasts = [b["last_ts"] for b in blocks if b["last_ts"]]
+        length = sum(b["length"] for b in blocks)
+        segment = {
+            "name": name,
+            "start": pending["start"],
+            "length": length,
+            "compressed_length": sum(b["compressed_length"] for b in blocks),
+            "records": sum(b["records"] for b in blocks),
+            "first_ts": min(firsts) if firsts else None,
+            "last_ts": max(lasts) if lasts else None,
+            "blocks": blocks,
+        }
+
+        with self._locked():
+            if self.index.get("pending") != pending:
+                os.remove(tmp)
+                return
+            os.replace(tmp, self._segment_path(name))
+            index = {k: v for k, v in self.index.items() if k != "pending"}
+            index["segments"] = list(index.get("segments", [])) + [segment]
+            index["active_base"] = pending["start"] + length
+            self._write_index(index)
+        os.remove(raw_path)
+
+    def _compress(self, raw_path: str, length: int, out_path: str) -> List[Dict[str, Any]]:
+        """Writes `length` bytes of `raw_path` to `out_path` as one gzip member per block; returns the blocks."""
+        blocks: List[Dict[str, Any]] = []
+        offset = compressed = 0
+        with open(raw_path, "rb") as f, open(out_path, "wb") as out:
+            while offset < length:
+                lines: List[bytes] = []
+                size = 0
+                while len(lines) < self.block_records and offset + size < length:
+                    line = f.readline(length - offset - size)
+                    if not line:
+                        break
+                    lines.append(line)
+                    size += len(line)
+                if not lines:
+                    break
+                chunk = b"".join(lines)
+                stamps = [s for s in map(_timestamp, lines) if s]
+                member = gzip.compress(chunk, compresslevel=COMPRESS_LEVEL, mtime=0)
+                out.write(member)
+                blocks.append({
+                    "offset": offset,
+                    "length": len(chunk),
+                    "compressed_offset": compressed,
+                    "compressed_length": len(member),
+                    "records": len(lines),
+                    "first_ts": min(stamps) if stamps else None,
+                    "last_ts": max(stamps) if stamps else None,
+                })
+                offset += len(chunk)
+                compressed += len(member)
+            out.flush()
+            os.fsync(out.fileno())
+        return blocks
+
+
+def _timestamp(line: bytes) -> Optional[str]:
+    try:
+        return json.loads(line).get("timestamp") or None
+    except (ValueError, AttributeError):
+        return None
+
+
+def read_span(span: Dict[str, Any]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yields (global end offset, record) for one span of SegmentedLog.read_plan()."""
+    try:
+        with open(span["file"], "rb") as f:
+            if span.get("inode") is not None and os.fstat(f.fileno()).st_ino != span["inode"]:
+                raise _Rotated()
+            if "compressed_offset" in span:
+                f.seek(span["compressed_offset"])
+                data = gzip.decompress(f.read(span["compressed_length"]))
+            else:
+                f.seek(span["offset"])
+                data = f.read(span["length"])
+    except (FileNotFoundError, _Rotated):
+        # Sealed or rotated since the plan was made: the same global offsets
+        # now live in another file, which the regular reader resolves
+        end = span["start"] + span["length"]
+        log = SegmentedLog(span["log"], span["segments_dir"])
+        for rec_end, rec in log.iter_from(max(span["after"], span["start"])):
+            if rec_end > end:
+                return
+            yield rec_end, rec
+        return
+    for end, rec in parse_lines(data, span["start"]):
+        if end > span["after"]:
+            yield end, rec
@@ -0,0 +1,111 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .batch_scoring import DECISION_LABELS, decision_codes_array, score_arrays
+from .models import AxisRange, SensitivityBoundary, SensitivityInput, SensitivityOutput
+from .policy import MAX_DAYS, MAX_EXCITEMENT, Policy, get_policy
+
+SENSITIVITY_MAX_CELLS = int(os.getenv("SENSITIVITY_MAX_CELLS", "250000"))
+SENSITIVITY_MAX_BOUNDARIES = int(os.getenv("SENSITIVITY_MAX_BOUNDARIES", "5000"))
+
+# Valid (inclusive) bounds and integer-ness of each field, matching OpportunityInput
+FIELD_BOUNDS = {
+    "cost_to_fulfill": (0.0, None, False),
+    "expected_earnings": (0.0, None, False),
+    "expected_time_days": (1, MAX_DAYS, True),
+    "excitement_level": (0, MAX_EXCITEMENT, True),
+}
+
+
+def axis_values(field: str, spec: AxisRange) -> np.ndarray:
+    if spec.values is not None:
+        values = np.array(spec.values, dtype=np.float64)
+    elif spec.start is not None and spec.stop is not None:
+        values = np.linspace(spec.start, spec.stop, spec.steps)
+    else:
+        raise ValueError(f"{field}: give either values or start + stop.")
+
+    lo, hi, integer = FIELD_BOUNDS[field]
+    if integer:
+        # Integer fields collapse to distinct whole numbers
+        values = np.unique(np.rint(values)).astype(np.int64)
+    if (values < lo).any() or (hi is not None and (values > hi).any()):
+        raise ValueError(f"{field}: values must be within [{lo}, {hi if hi is not None else 'inf'}].")
+    return values
+
+
+def evaluate_grid(req: SensitivityInput, policy: Optional[Policy] = None) -> SensitivityOutput:
+    """
+    Scores the base opportunity over the cartesian product of the given ranges
+    in one broadcast pass. Nothing is written to memory.
+    """
+    policy = policy or get_policy()
+    base = req.base
+    fields = list(req.ranges)
+    axes = {f: axis_values(f, req.ranges[f]) for f in fields}
+    shape = tuple(len(axes[f]) for f in fields)
+
+    cells = int(np.prod(shape))
+    if cells > SENSITIVITY_MAX_CELLS:
+        raise ValueError(f"Grid has {cells} cells; the limit is {SENSITIVITY_MAX_CELLS}.")
+
+    def column(field: str, default):
+        if field not in axes:
+            return np.asarray(default)
+        view = [1] * len(fields)
+        view[fields.index(field)] = -1
+        return axes[field].reshape(view)
+
+    matched = policy.matcher.find(base.risks_and_concerns)
+    cols = score_arrays(
+        cost=column("cost_to_fulfill", base.cost_to_fulfill).astype(np.float64),
+        earnings=column("expected_earnings", base.expected_earnings).astype(np.float64),
+        expected_time_days=column("expected_time_days", base.expected_time_days).astype(np.int64),
+        can_close=np.asarray(base.can_close_within_timeframe),
+        penalties=np.asarray(policy.matcher.penalty(matched)),
+        client_modifier=np.asarray(policy.client_level_modifier(base.client_level)),
+        excitement_level=column("excitement_level", base.excitement_level).astype(np.int64),
+        policy=policy,
+    )
+    total = np.broadcast_to(cols["total_score"], shape)
+    codes = decision_codes_array(total, policy)
+
+    return SensitivityOutput(
+        axes={f: axes[f].tolist() for f in fields},
+        shape=list(shape),
+        decision_labels=DECISION_LABELS,
+        total_score=total.ravel().tolist(),
+        decision=codes.ravel().tolist(),
+        boundaries=find_boundaries(codes, fields, axes),
+    )
+
+
+def find_boundaries(codes: np.ndarray, fields: List[str], axes: Dict[str, np.ndarray]) -> List[SensitivityBoundary]:
+    """Cells whose decision differs from the next cell along some axis."""
+    out: List[SensitivityBoundary] = []
+    for k, field in enumerate(fields):
+        if codes.shape[k] < 2:
+            continue
+        lead = [slice(None)] * codes.ndim
+        lead[k] = slice(None, -1)
+        trail = [slice(None)] * codes.ndim
+        trail[k] = slice(1, None)
+        before, after = codes[tuple(lead)], codes[tuple(trail)]
+        for idx in np.argwhere(before != after):
+            if len(out) >= SENSITIVITY_MAX_BOUNDARIES:
+                return out
+            cell = tuple(int(i) for i in idx)
+            out.append(SensitivityBoundary(
+                axis=field,
+                index=int(np.ravel_multi_index(cell, codes.shape)),
+                at={f: _plain(axes[f][cell[j]]) for j, f in enumerate(fields)},
+                decision=DECISION_LABELS[before[cell]],
+                next_decision=DECISION_LABELS[after[cell]],
+            ))
+    return out
+
+
+def _plain(value) -> float:
+    return value.item() if hasattr(value, "item") else value
@@ -0,0 +1,328 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SIMILAR_VERSION = 1
+# Similar past opportunities returned by /evaluate (0 = off)
+SIMILAR_TOP_K = int(os.getenv("SIMILAR_TOP_K", "3"))
+# Oldest opportunities are evicted past this; each costs ~4 bytes per permutation plus its metadata
+SIMILAR_MAX_DOCS = int(os.getenv("SIMILAR_MAX_DOCS", "50000"))
+# Ids kept per LSH bucket, newest first; bounds the work of one lookup
+SIMILAR_BUCKET_CAP = int(os.getenv("SIMILAR_BUCKET_CAP", "32"))
+SIMILAR_SNAPSHOT_INTERVAL = float(os.getenv("SIMILAR_SNAPSHOT_INTERVAL", "60"))
+
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: pairs above ~0.5 Jaccard almost always share a bucket
+_TOKEN = re.compile(r"[a-z0-9]{3,}")
+_STOPWORDS = frozenset(
+    "the and for with that this are from was were will would have has had not but you your our "
+    "they them their its can could should into about more less some any all per via"
+    .split()
+)
+
+# (id, timestamp, title, client_level, decision, total_score, signature)
+Doc = Tuple[int, str, str, str, str, int, array]
+
+
+def default_similar_path(path: str) -> str:
+    root, _ = os.path.splitext(path)
+    return root + ".similar.json"
+
+
+def opportunity_text(opp: Dict[str, Any]) -> str:
+    return " ".join(str(opp.get(k) or "") for k in ("opportunity_title", "description", "risks_and_concerns"))
+
+
+def words(text: str) -> List[str]:
+    """Distinct content words of `text`; the sets compared by Jaccard similarity."""
+    return [t for t in set(_TOKEN.findall(text.lower())) if t not in _STOPWORDS]
+
+
+@lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> Tuple[int, ...]:
+    # NUM_PERM independent 32-bit hashes per word from one extendable-output
+    # digest (stable across processes, unlike hash()); vocabularies repeat,
+    # so most words hit the cache.
+    return tuple(array("I", hashlib.shake_128(word.encode("utf-8")).digest(4 * NUM_PERM)))
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index over the stored opportunities' title, description and
+    risks, for "similar past opportunities" lookups.
+
+    Each opportunity is reduced to a fixed-size MinHash signature; banding the
+    signature into LSH buckets means a lookup only looks at opportunities that
+    share a bucket (at most BANDS * bucket_cap ids), never the whole history.
+    Candidates are ranked by shared buckets and then by the Jaccard similarity
+    estimated from their signatures.
+
+    Kept current like app.stats: fold() indexes the records this process just
+    wrote, sync() only the records appended since the last store id seen
+    (other processes' included, skipping ids already indexed), and the index
+    is persisted next to the store. warm_up() loads that snapshot and catches it up with the log; it
+    runs in the background; until it is done lookups only see what is loaded
+    so far and sync() is a no-op. At most `max_docs` opportunities are kept (oldest
+    evicted first), so memory stays bounded.
+    """
+
+    def __init__(
+        self,
+        store,
+        path: Optional[str] = None,
+        max_docs: int = SIMILAR_MAX_DOCS,
+        bucket_cap: int = SIMILAR_BUCKET_CAP,
+        snapshot_interval: float = SIMILAR_SNAPSHOT_INTERVAL,
+    ):
+        self.store = store
+        self.path = path or default_similar_path(store.path)
+        self.max_docs = max(1, max_docs)
+        self.bucket_cap = max(1, bucket_cap)
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()  # guards the index; held briefly (lookups, writer folds, warm-up inserts)
+        self._sync_lock = threading.Lock()  # one sync at a time, reading the log outside _lock
+        self._warm = threading.Event()
+        self._saver: Optional[threading.Thread] = None
+        self._reset()
+        self._saved_at = time.monotonic()
+        self.synced_at = time.monotonic()
+        self.behind = False  # records from other processes are known to be missing
+        self._dirty = False
+
+    def _reset(self) -> None:
+        self.last_id = 0
+        self._docs: Dict[int, Doc] = {}  # insertion (= id) order, oldest first
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @property
+    def ready(self) -> bool:
+        return self._warm.is_set()
+
+    def warm_up(self) -> None:
+        """Loads the snapshot and indexes the records appended since; lookups are served meanwhile."""
+        with self._sync_lock:
+            if self.ready:
+                return
+            self._load()
+            self._sync()
+            self._warm.set()
+
+    def start_warm_up(self) -> threading.Thread:
+        thread = threading.Thread(target=self.warm_up, name="similar-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def signature(self, text: str) -> Optional[array]:
+        """MinHash signature: per hash function, the minimum over the text's words."""
+        hashes = [_word_hashes(w) for w in words(text)]
+        if not hashes:
+            return None
+        return array("I", map(min, zip(*hashes)))
+
+    def _band_keys(self, sig: array) -> Iterable[Tuple[int, bytes]]:
+        raw = sig.tobytes()
+        width = len(raw) // BANDS
+        for band in range(BANDS):
+            yield band, raw[band * width:(band + 1) * width]
+
+    # Updates ---------------------------------------------------------------
+
+    def sync(self) -> int:
+        """Indexes the records appended since the last sync; returns how many (0 until warm_up() is done)."""
+        if not self.ready:
+            return 0  # warm_up() catches up with everything appended meanwhile
+        with self._sync_lock:
+            added = self._sync()
+            self._maybe_save()
+            return added
+
+    def fold(self, after: int, items: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """
+        Indexes records this process just wrote: `items` are (id, record),
+        `after` the id just before the first (see JsonlStore.last_append).
+        """
+        if not self.ready:
+            return
+        with self._sync_lock:
+            docs = [self._doc(row_id, rec) for row_id, rec in items if row_id > self.last_id and row_id not in self._docs]
+            with self._lock:
+                for doc in docs:
+                    if doc is not None:
+                        self._insert(doc)
+                        self._dirty = True
+                if after <= self.last_id:
+                    self.last_id = max(self.last_id, items[-1][0])
+                elif docs:
+                    self.behind = True
+            self._maybe_save()
+
+    def _maybe_save(self) -> None:
+        if self._dirty and time.monotonic() - self._saved_at >= self.snapshot_interval:
+            self._start_saver()
+
+    def _sync(self) -> int:
+        end = self.store.end_id()
+        if self.last_id > end:
+            with self._lock:
+                self._reset()  # the log was truncated or replaced
+        added = 0
+        if self.last_id < end:
+            for row_id, rec in self.store.iter_records(after=self.last_id):
+                # Records this process folded in already are not hashed again
+                doc = self._doc(row_id, rec) if row_id not in self._docs else None
+                with self._lock:
+                    if doc is not None:
+                        self._insert(doc)
+                        added += 1
+                        self._dirty = True
+                    self.last_id = row_id
+        self.behind = False
+        self.synced_at = time.monotonic()
+        return added
+
+    def _doc(self, row_id: int, rec: Dict[str, Any]) -> Optional[Doc]:
+        opp = rec.get("opportunity", {}) or {}
+        res = rec.get("result") or rec.get("decision") or {}
+        sig = self.signature(opportunity_text(opp))
+        if sig is None:
+            return None
+        return (
+            row_id,
+            rec.get("timestamp", ""),
+            opp.get("opportunity_title", ""),
+            opp.get("client_level", ""),
+            res.get("decision", ""),
+            (res.get("score", {}) or {}).get("total_score", 0),
+            sig,
+        )
+
+    def _insert(self, doc: Doc) -> None:
+        doc_id = doc[0]
+        self._docs[doc_id] = doc
+        for band, key in self._band_keys(doc[-1]):
+            ids = self._buckets[band].setdefault(key, [])
+            ids.append(doc_id)
+            if len(ids) > self.bucket_cap:
+                del ids[0]
+        while len(self._docs) > self.max_docs:
+            self._evict(next(iter(self._docs)))
+
+    def _evict(self, doc_id: int) -> None:
+        doc = self._docs.pop(doc_id)
+        for band, key in self._band_keys(doc[-1]):
+            ids = self._buckets[band].get(key)
+            if ids and doc_id in ids:
+                ids.remove(doc_id)
+                if not ids:
+                    del self._buckets[band][key]
+
+    # Lookup ----------------------------------------------------------------
+
+    def query(self, opp: Dict[str, Any], k: int = SIMILAR_TOP_K) -> List[Dict[str, Any]]:
+        """Up to `k` indexed opportunities most similar to `opp` (an OpportunityInput dict), best first."""
+        if k <= 0:
+            return []
+        sig = self.signature(opportunity_text(opp))
+        if sig is None:
+            return []
+        keys = list(self._band_keys(sig))
+        with self._lock:
+            votes: Counter = Counter()
+            for band, key in keys:
+                ids = self._buckets[band].get(key)
+                if ids:
+                    votes.update(ids)
+            ranked = []
+            for doc_id, _ in votes.most_common(k * 4):
+                doc = self._docs[doc_id]
+                same = sum(1 for x, y in zip(sig, doc[-1]) if x == y)
+                ranked.append((same / NUM_PERM, doc))
+        ranked.sort(key=lambda r: (r[0], r[1][0]), reverse=True)
+        return [
+            {
+                "id": doc[0],
+                "timestamp": doc[1],
+                "opportunity_title": doc[2],
+                "client_level": doc[3],
+                "decision": doc[4],
+                "total_score": doc[5],
+                "similarity": round(similarity, 3),
+            }
+            for similarity, doc in ranked[:k]
+        ]
+
+    # Persistence -----------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (
+            not isinstance(state, dict)
+            or state.get("version") != SIMILAR_VERSION
+            or state.get("backend") != self.store.name
+            or state.get("num_perm") != NUM_PERM
+            or state.get("bands") != BANDS
+        ):
+            return
+        try:
+            docs = [tuple(meta) + (array("I", base64.b64decode(sig)),) for *meta, sig in state["docs"]]
+            last_id = state["last_id"]
+        except (KeyError, TypeError, ValueError):
+            return
+        for doc in docs:
+            with self._lock:  # taken per doc, so lookups are not held up by the whole load
+                self._insert(doc)
+        self.last_id = last_id
+
+    def save(self) -> None:
+        """Writes the snapshot if anything changed since the last one (waits for a background save)."""
+        if self._saver is not None:
+            self._saver.join()
+        if self.ready:
+            self._save()
+
+    def _start_saver(self) -> None:
+        # Serializing tens of thousands of docs takes a while; keep it off the caller's (the writer's) thread
+        if self._saver is None or not self._saver.is_alive():
+            self._saved_at = time.monotonic()
+            self._saver = threading.Thread(target=self._save, name="similar-snapshot", daemon=True)
+            self._saver.start()
+
+    def _save(self) -> None:
+        # Docs are immutable tuples (bucket lists are rebuilt on load, not saved),
+        # so copying the references under the lock is enough; encoding and
+        # writing run outside it while lookups and syncs carry on.
+        with self._lock:
+            if not self._dirty:
+                return
+            docs = list(self._docs.values())
+            last_id = self.last_id
+            self._dirty = False
+        state = {
+            "version": SIMILAR_VERSION,
+            "backend": self.store.name,
+            "num_perm": NUM_PERM,
+            "bands": BANDS,
+            "last_id": last_id,
+            "docs": [list(doc[:-1]) + [base64.b64encode(doc[-1].tobytes()).decode("ascii")] for doc in docs],
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._saved_at = time.monotonic()
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+STATS_VERSION = 1
+# Write the snapshot at most this often (seconds) while records arrive; always on save()
+STATS_SNAPSHOT_INTERVAL = float(os.getenv("STATS_SNAPSHOT_INTERVAL", "30"))
+
+SCORE_BIN_WIDTH = 10
+SCORE_BINS = 100 // SCORE_BIN_WIDTH  # the last bin also holds 100
+# Rolling windows are summed from hourly buckets, so they are exact to the hour
+WINDOWS = {"24h": timedelta(hours=24), "7d": timedelta(days=7)}
+_KEEP = max(WINDOWS.values()) + timedelta(hours=1)
+
+
+def default_stats_path(path: str) -> str:
+    root, _ = os.path.splitext(path)
+    return root + ".stats.json"
+
+
+def _hour(dt: datetime) -> str:
+    # Same prefix as the stored ISO timestamps, so keys compare as strings
+    return dt.strftime("%Y-%m-%dT%H")
+
+
+def _counts() -> Dict[str, Any]:
+    return {"total": 0, "by_decision": {}, "confidence_sum": 0, "score_sum": 0}
+
+
+def _add(counts: Dict[str, Any], decision: str, confidence: float, score: float) -> None:
+    counts["total"] += 1
+    counts["by_decision"][decision] = counts["by_decision"].get(decision, 0) + 1
+    counts["confidence_sum"] += confidence
+    counts["score_sum"] += score
+
+
+def _merge(into: Dict[str, Any], counts: Dict[str, Any]) -> None:
+    into["total"] += counts["total"]
+    for decision, n in counts["by_decision"].items():
+        into["by_decision"][decision] = into["by_decision"].get(decision, 0) + n
+    into["confidence_sum"] += counts["confidence_sum"]
+    into["score_sum"] += counts["score_sum"]
+
+
+def _summary(counts: Dict[str, Any]) -> Dict[str, Any]:
+    total = counts["total"]
+    return {
+        "total": total,
+        "by_decision": dict(sorted(counts["by_decision"].items())),
+        "acceptance_rate": counts["by_decision"].get("ACCEPT", 0) / total if total else None,
+        "mean_confidence": counts["confidence_sum"] / total if total else None,
+        "mean_total_score": counts["score_sum"] / total if total else None,
+    }
+
+
+def _number(value: Any) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+class DecisionStats:
+    """
+    Running aggregates over the memory backend: counts per decision and per
+    client_level, a total_score histogram, mean confidence, and rolling 24h/7d
+    windows.
+
+    fold() adds the records this process just wrote, as they are, without
+    reading the log. sync() reads only what was appended since the last id
+    seen: store ids only grow (global log offsets for JSONL, row ids for
+    SQLite), so that id is the whole cursor, and records written by other
+    processes are picked up there. Records folded past a gap (another process
+    wrote in between) are remembered by id and skipped when sync() reaches
+    them. The aggregates are persisted next to the store as a small JSON
+    snapshot; on startup it is loaded and caught up, and only rebuilt from
+    scratch when it is missing, unreadable, or ahead of the store (the log
+    was truncated or replaced). snapshot() never reads the history.
+    """
+
+    def __init__(self, store, path: Optional[str] = None, snapshot_interval: float = STATS_SNAPSHOT_INTERVAL):
+        self.store = store
+        self.path = path or default_stats_path(store.path)
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._state = self._load() or self._empty()
+        # Ids past last_id already folded in (the gaps before them are not)
+        self._folded: Set[int] = set(self._state.pop("folded", []))
+        self._saved_at = time.monotonic()
+        self.synced_at = time.monotonic()
+        self._dirty = False
+
+    def _empty(self) -> Dict[str, Any]:
+        return {
+            "version": STATS_VERSION,
+            "backend": self.store.name,
+            "last_id": 0,
+            "all": _counts(),
+            "by_client_level": {},
+            "score_histogram": [0] * SCORE_BINS,
+            "first_timestamp": None,
+            "last_timestamp": None,
+            "hours": {},
+        }
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("version") != STATS_VERSION or state.get("backend") != self.store.name:
+            return None
+        return state
+
+    @property
+    def behind(self) -> bool:
+        """True if records written by other processes are known to be missing."""
+        return bool(self._folded)
+
+    def sync(self) -> int:
+        """Adds the records appended since the last sync; returns how many."""
+        with self._lock:
+            end = self.store.end_id()
+            if self._state["last_id"] > end:
+                self._state = self._empty()
+                self._folded.clear()
+            added = 0
+            if self._state["last_id"] < end:
+                for row_id, rec in self.store.iter_records(after=self._state["last_id"]):
+                    if row_id in self._folded:
+                        self._folded.discard(row_id)
+                    else:
+                        self._add(rec)
+                        added += 1
+                    self._state["last_id"] = row_id
+            self._folded = {i for i in self._folded if i > self._state["last_id"]}
+            self.synced_at = time.monotonic()
+            self._updated(added)
+            return added
+
+    def fold(self, after: int, items: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """
+        Adds records this process just wrote: `items` are (id, record), and
+        `after` is the id just before the first of them (see
+        JsonlStore.last_append). Records already read by sync() are skipped.
+        """
+        with self._lock:
+            last_id = self._state["last_id"]
+            new = [(row_id, rec) for row_id, rec in items if row_id > last_id and row_id not in self._folded]
+            for _, rec in new:
+                self._add(rec)
+            if after <= last_id:
+                # Nothing from anyone else in between: the cursor moves on without reading
+                self._state["last_id"] = max(last_id, items[-1][0])
+            else:
+                self._folded.update(row_id for row_id, _ in new)
+            self._updated(len(new))
+
+    def _updated(self, added: int) -> None:
+        if added:
+            self._prune(datetime.now(timezone.utc))
+            self._dirty = True
+        if self._dirty and time.monotonic() - self._saved_at >= self.snapshot_interval:
+            self._save()
+
+    def _add(self, rec: Dict[str, Any]) -> None:
+        opp = rec.get("opportunity", {}) or {}
+        res = rec.get("result") or rec.get("decision") or {}
+        decision = res.get("decision")
+        if not decision:
+            return
+        timestamp = rec.get("timestamp") or ""
+        confidence = _number(res.get("confidence"))
+        score = _number((res.get("score", {}) or {}).get("total_score"))
+        s = self._state
+
+        _add(s["all"], decision, confidence, score)
+        level = opp.get("client_level") or "unknown"
+        _add(s["by_client_level"].setdefault(level, _counts()), decision, confidence, score)
+        s["score_histogram"][min(max(int(score) // SCORE_BIN_WIDTH, 0), SCORE_BINS - 1)] += 1
+        if timestamp:
+            if s["first_timestamp"] is None or timestamp < s["first_timestamp"]:
+                s["first_timestamp"] = timestamp
+            if s["last_timestamp"] is None or timestamp > s["last_timestamp"]:
+                s["last_timestamp"] = timestamp
+            _add(s["hours"].setdefault(timestamp[:13], _counts()), decision, confidence, score)
+
+    def _prune(self, now: datetime) -> None:
+        cutoff = _hour(now - _KEEP)
+        hours = self._state["hours"]
+        for hour in [h for h in hours if h < cutoff]:
+            del hours[hour]
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Current aggregates; cost depends only on the number of hourly buckets and client levels."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            s = self._state
+            windows = {}
+            for name, span in WINDOWS.items():
+                since = _hour(now - span)
+                counts = _counts()
+                for hour, c in s["hours"].items():
+                    if hour >= since:
+                        _merge(counts, c)
+                windows[name] = _summary(counts)
+            return dict(
+                _summary(s["all"]),
+                by_client_level={level: _summary(c) for level, c in sorted(s["by_client_level"].items())},
+                score_histogram={"bin_width": SCORE_BIN_WIDTH, "counts": list(s["score_histogram"])},
+                first_timestamp=s["first_timestamp"],
+                last_timestamp=s["last_timestamp"],
+                windows=windows,
+                as_of_id=s["last_id"],
+            )
+
+    def save(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(self._state, folded=sorted(self._folded)), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._saved_at = time.monotonic()
+        self._dirty = False
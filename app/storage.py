@@ -0,0 +1,515 @@
+import base64
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .segments import DEFAULT_BLOCK_RECORDS, DEFAULT_SPAN_RECORDS, SegmentedLog
+from .segments import read_span as read_log_span
+
+SORT_FIELDS = ("timestamp", "total_score")
+# Type a cursor's sort value must have for each sort field (keysets compare it against the column)
+SORT_VALUE_TYPES = {"timestamp": str, "total_score": int}
+
+# A memory record, either as a dict or already encoded as one JSON line (no newline)
+Record = Union[Dict[str, Any], bytes]
+# What one append_many() wrote: (the id just before its first record, the ids of its records)
+Appended = Tuple[int, List[int]]
+FILTER_FIELDS = ("decision", "client_level", "client_type")
+
+
+def encode_line(record: Record) -> bytes:
+    if isinstance(record, bytes):
+        return record + b"\n"
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def record_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Flattens the indexed columns out of a stored memory record."""
+    opp = record.get("opportunity", {}) or {}
+    res = record.get("result") or record.get("decision") or {}
+    return {
+        "timestamp": record.get("timestamp", ""),
+        "decision": res.get("decision", ""),
+        "client_level": opp.get("client_level", ""),
+        "client_type": opp.get("client_type", ""),
+        "total_score": (res.get("score", {}) or {}).get("total_score", 0),
+    }
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    raw = json.dumps([sort_value, row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor.") from None
+
+
+class DecisionQuery:
+    """
+    Filters + keyset pagination for GET /decisions.
+    `since`/`until` are ISO-8601 UTC strings compared against the stored timestamp.
+    """
+
+    def __init__(
+        self,
+        decision: Optional[str] = None,
+        client_level: Optional[str] = None,
+        client_type: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        sort: str = "timestamp",
+        order: str = "desc",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ):
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of {SORT_FIELDS}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        self.decision = decision
+        self.client_level = client_level
+        self.client_type = client_type
+        self.since = since
+        self.until = until
+        self.min_score = min_score
+        self.max_score = max_score
+        self.sort = sort
+        self.order = order
+        self.limit = max(1, limit)
+        self.after = decode_cursor(cursor) if cursor else None
+        if self.after is not None and type(self.after[0]) is not SORT_VALUE_TYPES[sort]:
+            raise ValueError(f"Cursor does not match sort field '{sort}'.")
+
+    def matches(self, fields: Dict[str, Any]) -> bool:
+        for name in FILTER_FIELDS:
+            wanted = getattr(self, name)
+            if wanted is not None and fields[name] != wanted:
+                return False
+        if self.since is not None and fields["timestamp"] < self.since:
+            return False
+        if self.until is not None and fields["timestamp"] >= self.until:
+            return False
+        if self.min_score is not None and fields["total_score"] < self.min_score:
+            return False
+        if self.max_score is not None and fields["total_score"] > self.max_score:
+            return False
+        return True
+
+
+class JsonlStore:
+    """
+    Default backend: one JSON record per line. Queries are full scans.
+
+    Safe to share one file between processes: each batch goes out as a single
+    write() on an O_APPEND descriptor, which the kernel appends atomically, so
+    lines from different writers never interleave or tear.
+
+    With `max_bytes` and/or `max_age` set, the live file is rotated into a
+    compressed segment (see app.segments) once it reaches that size or age.
+    Appenders then hold a shared flock while writing (they never wait on each
+    other) and rotation takes it exclusively, so no write lands in a file that
+    is being rotated away.
+    """
+
+    name = "jsonl"
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        max_age: float = 0.0,
+        block_records: int = DEFAULT_BLOCK_RECORDS,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.block_records = block_records
+        self._fd: Optional[int] = None
+        self._base = 0  # global offset where the file behind _fd starts
+        self._write_end: Optional[int] = None  # local offset where the last write ended, if in one piece
+        self._lock_fd: Optional[int] = None
+        self._started: Optional[float] = None
+        self._sealer: Optional[threading.Thread] = None
+        # Ids of the last append_many(), or None if unknown (a split write)
+        self.last_append: Optional[Appended] = None
+
+    @property
+    def rotating(self) -> bool:
+        return self.max_bytes > 0 or self.max_age > 0
+
+    def _log(self) -> SegmentedLog:
+        return SegmentedLog(self.path, block_records=self.block_records)
+
+    def append_many(self, records: Iterable[Record], fsync: bool = False) -> int:
+        """Returns the number of bytes written; last_append has the records' ids."""
+        lines = [encode_line(r) for r in records]
+        payload = b"".join(lines)
+        self.last_append = None
+        if not payload:
+            return 0
+        if not self.rotating:
+            self._write(payload, fsync)
+            self._record_ids(lines)
+            return len(payload)
+
+        lock_fd = self._lock()
+        fcntl.flock(lock_fd, fcntl.LOCK_SH)
+        try:
+            if self._fd is not None and self._stale():
+                self.close_file()
+            size = self._write(payload, fsync)
+            self._record_ids(lines)
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        self._maybe_rotate(size)
+        return len(payload)
+
+    def _write(self, payload: bytes, fsync: bool) -> int:
+        """One write() per batch; returns the file size afterwards."""
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            # Rotation needs LOCK_EX, which we hold off while this file is ours to append to
+            self._base = self._log().active_base
+        view = memoryview(payload)
+        self._write_end = None
+        written = os.write(self._fd, view)
+        if written == len(view):
+            # O_APPEND moves the descriptor to the end of our own write, whoever else appended
+            self._write_end = os.lseek(self._fd, 0, os.SEEK_CUR)
+        view = view[written:]
+        while view:
+            # Short writes only happen on a full disk or a signal
+            view = view[os.write(self._fd, view):]
+        if fsync:
+            os.fsync(self._fd)
+        return os.fstat(self._fd).st_size
+
+    def _record_ids(self, lines: List[bytes]) -> None:
+        if self._write_end is None:
+            return
+        end = self._base + self._write_end - sum(map(len, lines))
+        after, ids = end, []
+        for line in lines:
+            end += len(line)
+            ids.append(end)
+        self.last_append = (after, ids)
+
+    def _lock(self) -> int:
+        if self._lock_fd is None:
+            log = self._log()
+            os.makedirs(log.segments_dir, exist_ok=True)
+            self._lock_fd = os.open(log.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._lock_fd
+
+    def _stale(self) -> bool:
+        """True if another store rotated the live file away from our descriptor."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _maybe_rotate(self, size: int) -> None:
+        due = self.max_bytes > 0 and size >= self.max_bytes
+        if not due and self.max_age > 0:
+            if self._started is None:
+                self._started = self._log().active_started()
+            due = time.time() - self._started >= self.max_age
+        if not due:
+            return
+
+        log = self._log()
+        if log.index.get("pending"):
+            # The last rotation is still being compressed (here or by another
+            # process, or one that died); keep appending until it is sealed
+            self._start_sealer(log)
+            return
+        inode = os.fstat(self._fd).st_ino
+        self.close_file()
+        self._started = None
+        # Every appender may see the size cross the limit; only the first rotation of this inode wins
+        if log.rotate(inode):
+            self._start_sealer(log)
+
+    def _start_sealer(self, log: SegmentedLog) -> None:
+        # Compress off the write path: appenders only wait for the final rename, and the raw segment is readable meanwhile
+        if self._sealer is None or not self._sealer.is_alive():
+            self._sealer = threading.Thread(target=log.seal_pending, name="memory-sealer", daemon=True)
+            self._sealer.start()
+
+    def close_file(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def close(self) -> None:
+        self.close_file()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        if self._sealer is not None:
+            self._sealer.join()
+            self._sealer = None
+
+    def iter_records(self, after: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yields (global end offset, record) across sealed segments and the live file; the offset doubles as the record id."""
+        yield from self._log().iter_from(after)
+
+    def end_id(self) -> int:
+        """No record has an id above this; iter_records(after=end_id()) yields nothing yet."""
+        return self._log().end_offset
+
+    def read_plan(
+        self, after: int = 0, since: Optional[str] = None, until: Optional[str] = None, span_records: int = DEFAULT_SPAN_RECORDS
+    ) -> List[Dict[str, Any]]:
+        """Spans of the records after `after` for read_span(), e.g. one per worker task (see SegmentedLog.read_plan)."""
+        return self._log().read_plan(after, since, until, span_records)
+
+    def query(self, q: DecisionQuery) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        hits = []
+        for row_id, rec in self.iter_records():
+            fields = record_fields(rec)
+            if q.matches(fields):
+                hits.append((fields[q.sort], row_id, rec))
+
+        reverse = q.order == "desc"
+        hits.sort(key=lambda h: (h[0], h[1]), reverse=reverse)
+        if q.after is not None:
+            after = tuple(q.after)
+            hits = [h for h in hits if ((h[0], h[1]) < after if reverse else (h[0], h[1]) > after)]
+        return _page(hits, q.limit)
+
+
+class SqliteStore:
+    """
+    SQLite backend in WAL mode with indexes on the common filter/sort columns.
+    Each thread gets its own connection; the memory writer thread is the only writer.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self.last_append: Optional[Appended] = None
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.synchronous = "NORMAL"
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS decisions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                decision TEXT NOT NULL,
+                client_level TEXT NOT NULL,
+                client_type TEXT NOT NULL,
+                total_score INTEGER NOT NULL,
+                record TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_decisions_timestamp ON decisions (timestamp, id);
+            CREATE INDEX IF NOT EXISTS ix_decisions_decision ON decisions (decision, timestamp);
+            CREATE INDEX IF NOT EXISTS ix_decisions_client_level ON decisions (client_level, timestamp);
+            CREATE INDEX IF NOT EXISTS ix_decisions_client_type ON decisions (client_type, timestamp);
+            CREATE INDEX IF NOT EXISTS ix_decisions_total_score ON decisions (total_score, id);
+            CREATE TABLE IF NOT EXISTS imports (
+                source TEXT PRIMARY KEY,
+                byte_offset INTEGER NOT NULL
+            );
+            """
+        )
+        conn.commit()
+
+    def append_many(self, records: Iterable[Record], fsync: bool = False) -> int:
+        """Returns the number of record bytes written (JSON payload only); last_append has the row ids."""
+        rows = _sqlite_rows(records)
+        self.last_append = None
+        if not rows:
+            return 0
+        conn = self._conn()
+        wanted = "FULL" if fsync else "NORMAL"
+        if self._local.synchronous != wanted:
+            conn.execute(f"PRAGMA synchronous={wanted}")
+            self._local.synchronous = wanted
+        with conn:
+            conn.executemany(_INSERT_SQL, rows)
+            # One transaction holds the write lock throughout, so its row ids are consecutive
+            last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        self.last_append = (last - len(rows), list(range(last - len(rows) + 1, last + 1)))
+        return sum(len(r[-1]) for r in rows)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def query(self, q: DecisionQuery) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        where, params = [], []
+        for name in FILTER_FIELDS:
+            wanted = getattr(q, name)
+            if wanted is not None:
+                where.append(f"{name} = ?")
+                params.append(wanted)
+        if q.since is not None:
+            where.append("timestamp >= ?")
+            params.append(q.since)
+        if q.until is not None:
+            where.append("timestamp < ?")
+            params.append(q.until)
+        if q.min_score is not None:
+            where.append("total_score >= ?")
+            params.append(q.min_score)
+        if q.max_score is not None:
+            where.append("total_score <= ?")
+            params.append(q.max_score)
+
+        op, direction = ("<", "DESC") if q.order == "desc" else (">", "ASC")
+        if q.after is not None:
+            where.append(f"({q.sort} {op} ? OR ({q.sort} = ? AND id {op} ?))")
+            params.extend([q.after[0], q.after[0], q.after[1]])
+
+        sql = f"SELECT {q.sort}, id, record FROM decisions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {q.sort} {direction}, id {direction} LIMIT ?"
+        params.append(q.limit + 1)
+
+        rows = self._conn().execute(sql, params).fetchall()
+        return _page([(v, row_id, json.loads(rec)) for v, row_id, rec in rows], q.limit)
+
+    def iter_records(self, after: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yields (row id, record) in insertion order for rows after `after`."""
+        rows = self._conn().execute("SELECT id, record FROM decisions WHERE id > ? ORDER BY id", (after,))
+        for row_id, rec in rows:
+            yield row_id, json.loads(rec)
+
+    def end_id(self) -> int:
+        row = self._conn().execute("SELECT MAX(id) FROM decisions").fetchone()
+        return row[0] or 0
+
+    def read_plan(
+        self, after: int = 0, since: Optional[str] = None, until: Optional[str] = None, span_records: int = DEFAULT_SPAN_RECORDS
+    ) -> List[Dict[str, Any]]:
+        """Row id ranges of about `span_records` rows after `after`, for read_span()."""
+        where, params = ["id > ?"], [after]
+        if since:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            where.append("timestamp < ?")
+            params.append(until)
+        lo, hi = self._conn().execute(f"SELECT MIN(id), MAX(id) FROM decisions WHERE {' AND '.join(where)}", params).fetchone()
+        if lo is None:
+            return []
+        step = max(1, span_records)
+        return [{"db": self.path, "after": a, "through": min(a + step, hi)} for a in range(lo - 1, hi, step)]
+
+    def import_jsonl(self, source: str, chunk_size: int = 5000) -> int:
+        """
+        Imports records appended to `source` (sealed segments included) since
+        the last import, tracked by global log offset. Returns the number of
+        records imported.
+        """
+        log = SegmentedLog(source)
+        if not log.exists:
+            return 0
+        key = os.path.abspath(source)
+        conn = self._conn()
+        row = conn.execute("SELECT byte_offset FROM imports WHERE source = ?", (key,)).fetchone()
+        offset = row[0] if row else 0
+        if offset > log.end_offset:
+            offset = 0  # log was truncated or replaced
+
+        imported = 0
+        chunk: List[Dict[str, Any]] = []
+        for offset, rec in log.iter_from(offset):
+            chunk.append(rec)
+            if len(chunk) >= chunk_size:
+                imported += self._import_chunk(chunk, key, offset)
+                chunk = []
+        imported += self._import_chunk(chunk, key, offset)
+        return imported
+
+    def _import_chunk(self, chunk: List[Dict[str, Any]], key: str, offset: int) -> int:
+        conn = self._conn()
+        # Rows and the new offset commit together so a rerun never duplicates
+        with conn:
+            conn.executemany(_INSERT_SQL, _sqlite_rows(chunk))
+            conn.execute(
+                "INSERT INTO imports (source, byte_offset) VALUES (?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET byte_offset = excluded.byte_offset",
+                (key, offset),
+            )
+        return len(chunk)
+
+
+_INSERT_SQL = (
+    "INSERT INTO decisions (timestamp, decision, client_level, client_type, total_score, record) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def read_span(span: Dict[str, Any]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yields (id, record) for one span of a store's read_plan(). Spans are plain
+    dicts and the files are opened here, so any process can read any span.
+    """
+    if "db" not in span:
+        yield from read_log_span(span)
+        return
+    conn = sqlite3.connect(span["db"])
+    try:
+        rows = conn.execute(
+            "SELECT id, record FROM decisions WHERE id > ? AND id <= ? ORDER BY id", (span["after"], span["through"])
+        )
+        for row_id, rec in rows:
+            yield row_id, json.loads(rec)
+    finally:
+        conn.close()
+
+
+def _sqlite_rows(records: Iterable[Record]) -> List[Tuple[Any, ...]]:
+    rows = []
+    for r in records:
+        if isinstance(r, bytes):
+            text = r.decode("utf-8")
+            f = record_fields(json.loads(text))
+        else:
+            text = json.dumps(r, ensure_ascii=False)
+            f = record_fields(r)
+        rows.append((
+            f["timestamp"], f["decision"], f["client_level"], f["client_type"],
+            f["total_score"], text,
+        ))
+    return rows
+
+
+def _page(hits: List[Tuple[Any, int, Dict[str, Any]]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    page = hits[:limit]
+    next_cursor = None
+    if len(hits) > limit and page:
+        next_cursor = encode_cursor(page[-1][0], page[-1][1])
+    return [dict(rec, id=row_id) for _, row_id, rec in page], next_cursor
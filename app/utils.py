@@ -1,26 +1,199 @@
+import bisect
 import json
-from typing import Any, Dict
+import re
+from typing import Any, Dict, List, Optional
 
-def extract_json_object(text: str) -> Dict[str, Any]:
+# Characters that change the scanner's state outside strings / inside strings
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_STRING_STOP = re.compile(r'["\\]')
+# An object starts with "{" then (after whitespace) a key or "}"; other braces are prose
+_OBJECT_START = re.compile(r'\{\s*(?:["}]|\Z)')
+_DECODER = json.JSONDecoder()
+
+
+class JsonObjectExtractor:
     """
-    Robustly extract JSON from model output.
-    Strategy:
-    1) Try full text as JSON
-    2) Find first '{' and last '}' and try that slice
+    Incremental extractor for the first top-level JSON object in text that
+    arrives in chunks (e.g. streamed model output).
+
+    feed() scans each chunk once, tracking nesting and string/escape state,
+    and returns the object as soon as its closing brace arrives. Prose and
+    code fences around it are skipped, as are braces not followed by a key
+    (e.g. "{placeholder}" in prose); a candidate that still turns out not to
+    be JSON is dropped and scanning resumes after its opening brace. While
+    the object is still open, `fields` holds every top-level member whose
+    value has already ended, so `get("decision")` can answer before the rest
+    of the object arrives.
+
+    Chunks are kept as a list (from the candidate's start on) and only the
+    spans that get parsed are joined, so feeding stays linear in the input.
     """
-    text = (text or "").strip()
 
-    # 1) direct parse
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self._parts: List[str] = []
+        self._starts: List[int] = []  # offset of each part in the whole input
+        self._end = 0  # offset just past the input fed so far
+        self._carry = ""  # tail that could not be decided yet, rescanned with the next chunk
+        self._reset_candidate()
+
+    def _reset_candidate(self) -> None:
+        self.fields = {}
+        self._start = 0  # offset of the candidate's "{"
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.fields.get(name, default)
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """Adds text; returns the object once it is complete (and from then on)."""
+        if self.result is None and chunk:
+            self._parts.append(chunk)
+            self._starts.append(self._end)
+            self._end += len(chunk)
+            text, self._carry = self._carry + chunk, ""
+            self._scan(text, self._end - len(text))
+        return self.result
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        End of input. If a candidate was still open, an object may yet be
+        nested inside it (the candidate itself can never close now).
+        """
+        if self.result is None and self._depth > 0:
+            try:
+                self.result = extract_json_object(self._text(self._start + 1, self._end))
+            except ValueError:
+                pass
+        return self.result
+
+    def _text(self, start: int, end: int) -> str:
+        k = bisect.bisect_right(self._starts, start) - 1
+        pieces = []
+        while k < len(self._parts) and self._starts[k] < end:
+            offset = self._starts[k]
+            pieces.append(self._parts[k][max(0, start - offset):end - offset])
+            k += 1
+        return "".join(pieces)
+
+    def _drop_before(self, offset: int) -> None:
+        k = bisect.bisect_right(self._starts, offset) - 1
+        if k > 0:
+            del self._parts[:k]
+            del self._starts[:k]
+
+    def _scan(self, text: str, base: int) -> None:
+        """Scans `text`, which starts at input offset `base`."""
+        i = 0
+        while i < len(text):
+            if self._in_string:
+                m = _STRING_STOP.search(text, i)
+                if m is None:
+                    return
+                i = m.start()
+                if text[i] == "\\":
+                    if i + 1 >= len(text):
+                        self._carry = "\\"  # the escaped character is in the next chunk
+                        return
+                    i += 2
+                    continue
+                self._in_string = False
+                if self._depth == 1 and self._expect_key:
+                    key = _loads(self._text(self._string_start, base + i + 1))
+                    self._key = key if isinstance(key, str) else None
+                    self._expect_key = False
+                i += 1
+                continue
+
+            if self._depth == 0:
+                m = _OBJECT_START.search(text, i)
+                if m is None:
+                    self._drop_before(base + len(text))  # prose only so far: nothing to keep
+                    return
+                i = m.start()
+                self._drop_before(base + i)
+                if m.group()[-1] not in '"}':
+                    self._carry = text[i:]  # "{" plus whitespace so far: decide with the next chunk
+                    return
+                self._start = base + i
+
+            m = _STRUCTURAL.search(text, i)
+            if m is None:
+                return
+            i = m.start()
+            ch = text[i]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = base + i
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = True
+            elif ch in "}]":
+                if self._depth == 1:
+                    self._end_field(base + i)
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = _loads(self._text(self._start, base + i + 1))
+                    if isinstance(obj, dict):
+                        self.result = obj
+                        self._parts, self._starts = [], []
+                        return
+                    # Not JSON after all: rescan from just after this "{"
+                    retry = self._start + 1
+                    self._reset_candidate()
+                    text, base, i = self._text(retry, self._end), retry, 0
+                    continue
+            elif self._depth == 1:
+                if ch == ":" and self._key is not None:
+                    self._value_start = base + i + 1
+                elif ch == ",":
+                    self._end_field(base + i)
+                    self._expect_key = True
+            i += 1
+
+    def _end_field(self, end: int) -> None:
+        if self._key is not None and self._value_start is not None:
+            value = _loads(self._text(self._value_start, end))
+            if value is not _INVALID:
+                self.fields[self._key] = value
+        self._key = None
+        self._value_start = None
+
+
+_INVALID = object()
+
+
+def _loads(text: str) -> Any:
     try:
         return json.loads(text)
-    except Exception:
-        pass
+    except ValueError:
+        return _INVALID
 
-    # 2) slice between first { and last }
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        raise ValueError("No JSON object found in model output.")
 
-    candidate = text[start:end+1]
-    return json.loads(candidate)
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """
+    Robustly extract JSON from model output: the first complete top-level
+    object, ignoring any prose or code fences around it. The text is already
+    complete, so each candidate "{" is handed to the C decoder, which stops at
+    the object's end (use JsonObjectExtractor for text still streaming in).
+    """
+    text = text or ""
+    for m in _OBJECT_START.finditer(text):
+        try:
+            obj, _ = _DECODER.raw_decode(text, m.start())
+        except ValueError:
+            continue
+        if isinstance(obj, dict):
+            return obj
+    raise ValueError("No JSON object found in model output.")
@@ -0,0 +1,186 @@
+"""
+Benchmarks for the evaluation hot path.
+
+    python -m benchmarks.bench run --output benchmarks/baseline.json   # before the change
+    python -m benchmarks.bench run --output current.json               # after it
+    python -m benchmarks.bench compare benchmarks/baseline.json current.json --threshold 0.15
+
+`compare` exits non-zero when any benchmark's median got slower than the
+threshold. Baselines are machine-specific and not committed: record one on
+the machine that runs the comparison.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import pydantic_core
+
+import export_csv
+from app import memory
+from app.agent import mock_decision
+from app.history import HistoryLoader
+from app.memory import append_memory, build_record, encode_record
+from app.scoring import score_opportunity
+
+from .generators import make_history, make_opportunities
+
+DEFAULT_SIZES = "1000,100000,1000000"
+DEFAULT_WORKDIR = ".bench"
+
+
+def measure(fn: Callable[[], None], repeat: int) -> List[float]:
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def summarize(times: List[float], ops: int) -> Dict[str, float]:
+    median = statistics.median(times)
+    return {
+        "median_s": median,
+        "min_s": min(times),
+        "ops": ops,
+        "per_op_us": median / ops * 1e6,
+    }
+
+
+def run(sizes: List[int], repeat: int, n_inputs: int, workdir: str, only: str = "") -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+
+    def bench(name: str, fn: Callable[[], None], ops: int, times: int = repeat) -> None:
+        if only and only not in name:
+            return
+        results[name] = summarize(measure(fn, times), ops)
+        r = results[name]
+        print(f"{name:<40} median {r['median_s'] * 1000:10.2f} ms   {r['per_op_us']:10.2f} µs/op", flush=True)
+
+    short = make_opportunities(n_inputs, seed=1)
+    long = make_opportunities(n_inputs, seed=2, long_risks=True)
+
+    bench("score_opportunity", lambda: [score_opportunity(o) for o in short], n_inputs)
+    bench("score_opportunity[long_risks]", lambda: [score_opportunity(o) for o in long], n_inputs)
+    bench("mock_decision", lambda: [mock_decision(o) for o in short], n_inputs)
+
+    decisions = [mock_decision(o) for o in short]
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = memory.MEMORY_PATH
+        memory.MEMORY_PATH = os.path.join(tmp, "decisions.jsonl")
+        try:
+            bench(
+                "build_record+append_memory",
+                lambda: [append_memory(build_record(o, d)) for o, d in zip(short, decisions)],
+                n_inputs,
+            )
+            bench(
+                "encode_record+append_memory",
+                lambda: [
+                    append_memory(encode_record(pydantic_core.to_json(o), pydantic_core.to_json(d)))
+                    for o, d in zip(short, decisions)
+                ],
+                n_inputs,
+            )
+        finally:
+            memory.MEMORY_PATH = old_path
+
+        for size in sizes:
+            path = make_history(os.path.join(workdir, f"history-{size}.jsonl"), size)
+            # Big histories are slow enough that fewer repeats are still stable
+            times = repeat if size <= 100_000 else max(1, repeat // 3)
+            out = os.path.join(tmp, "export.csv")
+
+            def export(path=path, out=out):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    export_csv.main(["--input", path, "--output", out])
+
+            bench(f"export_csv.main[{size}]", export, size, times)
+            bench(f"load_memory_as_dataframe[{size}]", lambda path=path: HistoryLoader(path).load(), size, times)
+
+    return results
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    base, cur = baseline["results"], current["results"]
+    failed = []
+    print(f"{'benchmark':<40} {'baseline ms':>12} {'current ms':>12} {'change':>9}")
+    for name in sorted(base.keys() & cur.keys()):
+        b, c = base[name]["median_s"], cur[name]["median_s"]
+        change = c / b - 1 if b > 0 else 0.0
+        mark = ""
+        if change > threshold:
+            failed.append(name)
+            mark = "  ❌ REGRESSION"
+        print(f"{name:<40} {b * 1000:12.2f} {c * 1000:12.2f} {change:+9.1%}{mark}")
+
+    for name in sorted(base.keys() - cur.keys()):
+        print(f"{name:<40} missing from current run")
+
+    if failed:
+        print(f"\n❌ {len(failed)} benchmark(s) slower than +{threshold:.0%}: {', '.join(failed)}")
+        return 1
+    print(f"\n✅ No regressions beyond +{threshold:.0%}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite for the evaluation hot path.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run benchmarks and write results as JSON")
+    p_run.add_argument("--output", default="benchmarks/results.json")
+    p_run.add_argument("--sizes", default=DEFAULT_SIZES, help="History sizes (comma-separated)")
+    p_run.add_argument("--repeat", type=int, default=5)
+    p_run.add_argument("--inputs", type=int, default=2000, help="Opportunities per scoring benchmark")
+    p_run.add_argument("--workdir", default=DEFAULT_WORKDIR, help="Where generated histories are cached")
+    p_run.add_argument("--only", default="", help="Run only benchmarks whose name contains this")
+
+    p_cmp = sub.add_parser("compare", help="Fail if current results regress against a baseline")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown (0.15 = +15%%)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        if not os.path.exists(args.baseline):
+            print(f"❌ No baseline at {args.baseline}; record one first with: python -m benchmarks.bench run --output {args.baseline}")
+            return 2
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, "r", encoding="utf-8") as f:
+            current = json.load(f)
+        return compare(baseline, current, args.threshold)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, args.repeat, args.inputs, args.workdir, args.only)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Wrote {len(results)} results to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from app.agent import mock_decision
+from app.memory import build_record
+from app.models import OpportunityInput
+
+RISK_PHRASES = [
+    "unclear requirements", "possible scope creep", "urgent deadline", "legal review needed",
+    "refund requested on last project", "complaint history", "chargeback risk",
+    "security audit", "third-party integration", "undocumented api", "unknown stakeholders",
+    "no budget confirmed", "delay in payments",
+]
+FILLER = (
+    "The client mentioned several stakeholders and a rough plan for the rollout. "
+    "Assets will be provided later and the exact deliverables are still being discussed. "
+)
+CLIENT_TYPES = ["New client", "Returning client", "Enterprise", "Agency", "Startup"]
+CLIENT_LEVELS = ["low", "normal", "high", "sensitive"]
+
+
+def risk_text(rng: random.Random, long: bool) -> str:
+    if not long:
+        return ", ".join(rng.sample(RISK_PHRASES, rng.randint(0, 3)))
+    parts: List[str] = []
+    size = 0
+    while size < 1900:
+        part = rng.choice(RISK_PHRASES) if rng.random() < 0.2 else FILLER
+        parts.append(part)
+        size += len(part) + 1
+    return " ".join(parts)[:2000]
+
+
+def make_opportunity(rng: random.Random, long_risks: bool = False) -> OpportunityInput:
+    cost = round(rng.uniform(0, 5000), 2)
+    return OpportunityInput(
+        opportunity_title=f"Opportunity {rng.randint(1, 10**6)}",
+        client_type=rng.choice(CLIENT_TYPES),
+        description="Website redesign with SEO, analytics setup and three landing pages.",
+        expected_time_days=rng.randint(1, 365),
+        cost_to_fulfill=cost,
+        expected_earnings=round(cost * rng.uniform(0.5, 3.5), 2),
+        expected_benefits="Retainer, referrals, portfolio value",
+        can_close_within_timeframe=rng.random() < 0.75,
+        risks_and_concerns=risk_text(rng, long_risks),
+        excitement_level=rng.randint(0, 10),
+        client_level=rng.choice(CLIENT_LEVELS),
+    )
+
+
+def make_opportunities(n: int, seed: int = 0, long_risks: bool = False) -> List[OpportunityInput]:
+    rng = random.Random(seed)
+    return [make_opportunity(rng, long_risks) for _ in range(n)]
+
+
+def make_history(path: str, n: int, seed: int = 0, distinct: int = 1000) -> str:
+    """
+    Writes an n-record JSONL memory log (reused if it already exists).
+    `distinct` real decisions are generated and cycled with increasing timestamps.
+    """
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    opps = make_opportunities(min(n, distinct), seed)
+    records = [build_record(o, mock_decision(o)) for o in opps]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for i in range(n):
+            rec = dict(records[i % len(records)], timestamp=(start + timedelta(seconds=30 * i)).isoformat())
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,109 @@
+"""
+Cold-start budget: how long importing each entry point takes.
+
+    python -m benchmarks.importtime                      # check against benchmarks/import_budget.json
+    python -m benchmarks.importtime --top 15             # also list the slowest modules
+
+Each target runs in a fresh interpreter under `python -X importtime`. Its cost
+is the cumulative import time of everything it loads, minus an empty
+interpreter's. The median over `--repeat` runs is compared with the budget.
+A target also fails if it loads a module listed as `forbidden`, so heavy
+dependencies can't silently creep back into startup.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(ROOT, "benchmarks", "import_budget.json")
+
+
+Entry = Tuple[int, int, int, str]  # (nesting depth, self µs, cumulative µs, module)
+
+
+def parse_importtime(stderr: str) -> List[Entry]:
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        name = name[1:]  # one space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        out.append((depth, int(head.replace("import time:", "")), int(cumulative_us), name.strip()))
+    return out
+
+
+def run_target(code: str, env: Dict[str, str]) -> List[Entry]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def total_ms(entries: List[Entry]) -> float:
+    return sum(cumulative for depth, _, cumulative, _ in entries if depth == 0) / 1000
+
+
+def measure(code: str, repeat: int, env: Dict[str, str]) -> Tuple[float, List[Entry]]:
+    runs = [run_target(code, env) for _ in range(repeat)]
+    return statistics.median(total_ms(r) for r in runs), runs[-1]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure import time of the entry points and enforce a budget.")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET, help="JSON budget file")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="Show the N modules with the most self time per target")
+    parser.add_argument("--output", help="Also write the measurements as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.budget, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+
+    # An empty memory dir so targets take their "no history yet" path
+    env = dict(os.environ, PYTHONPATH=ROOT, MEMORY_PATH=os.path.join(ROOT, ".bench", "importtime", "decisions.jsonl"))
+    baseline, _ = measure("pass", args.repeat, env)
+
+    failed = []
+    results = {}
+    print(f"{'target':<28} {'median ms':>10} {'budget ms':>10}")
+    for name, spec in budget["targets"].items():
+        ms, entries = measure(spec["code"], args.repeat, env)
+        ms = max(0.0, ms - baseline)
+        loaded = {module for *_, module in entries}
+        forbidden = sorted(m for m in spec.get("forbidden", []) if m in loaded)
+        results[name] = {"median_ms": ms, "budget_ms": spec["max_ms"], "forbidden_loaded": forbidden}
+
+        mark = ""
+        if ms > spec["max_ms"]:
+            mark += "  ❌ OVER BUDGET"
+        if forbidden:
+            mark += f"  ❌ loads {', '.join(forbidden)}"
+        if mark:
+            failed.append(name)
+        print(f"{name:<28} {ms:10.1f} {spec['max_ms']:10.0f}{mark}")
+
+        if args.top:
+            for _, self_us, _, module in sorted(entries, key=lambda e: -e[1])[:args.top]:
+                print(f"    {self_us / 1000:8.1f} ms  {module}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"baseline_ms": baseline, "results": results}, f, indent=2)
+
+    if failed:
+        print(f"\n❌ {len(failed)} target(s) over the import budget: {', '.join(failed)}")
+        return 1
+    print("\n✅ All targets within the import budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
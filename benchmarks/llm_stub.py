@@ -0,0 +1,115 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions API, for exercising
+the LLM decision engine (app.llm) without a real model.
+
+    python -m benchmarks.llm_stub --port 8090 --delay-ms 300 --fail-rate 0.1
+    LLM_BASE_URL=http://127.0.0.1:8090/v1 DECISION_ENGINE=llm uvicorn app.main:app
+
+Replies are derived from the score breakdown in the prompt, after `--delay-ms`
+(plus up to `--jitter-ms`). `--fail-rate` answers 500 and `--garbage-rate`
+answers text that is not a decision, to trigger the rule-based fallback.
+Decisions are wrapped in a code fence and followed by `--trailing-tokens` of
+commentary, like a chatty model, generated at 4 characters per `--token-ms`.
+With `"stream": true` they are sent as server-sent events as generated.
+GET /calls reports how many completions were requested.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+
+def make_app(
+    delay_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    fail_rate: float = 0.0,
+    garbage_rate: float = 0.0,
+    token_ms: float = 0.0,
+    trailing_tokens: int = 50,
+) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+    calls = {"total": 0, "failed": 0, "garbage": 0}
+
+    @app.get("/calls")
+    def get_calls():
+        return calls
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        calls["total"] += 1
+        await asyncio.sleep((delay_ms + random.uniform(0, jitter_ms)) / 1000)
+        roll = random.random()
+        if roll < fail_rate:
+            calls["failed"] += 1
+            raise HTTPException(status_code=500, detail="stub failure")
+        if roll < fail_rate + garbage_rate:
+            calls["garbage"] += 1
+            content = "Sorry, I cannot help with that."
+        else:
+            decision = json.dumps(reply_for(body["messages"][-1]["content"]))
+            content = f"Here is my evaluation:\n```json\n{decision}\n```\n" + "More commentary. " * (trailing_tokens // 4)
+        if body.get("stream"):
+            return StreamingResponse(sse(content, token_ms), media_type="text/event-stream")
+        # Unstreamed, the whole reply is generated before anything is sent
+        await asyncio.sleep(len(content) / 4 * token_ms / 1000)
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        }
+
+    return app
+
+
+async def sse(text: str, token_ms: float):
+    for i in range(0, len(text), 4):
+        chunk = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": text[i:i + 4]}}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(token_ms / 1000)
+    yield "data: [DONE]\n\n"
+
+
+def reply_for(prompt: str) -> dict:
+    try:
+        score = json.loads(prompt).get("score", {})
+    except ValueError:
+        score = {}
+    total = score.get("total_score", 50)
+    decision = "ACCEPT" if total >= 70 else "REJECT" if total < 55 else "NEEDS_INFO"
+    return {
+        "decision": decision,
+        "confidence": min(95, 50 + abs(total - 62)),
+        "summary": f"Stub model: {decision} at {total}/100.",
+        "key_reasons": [f"Total score {total}/100.", f"ROI {score.get('roi', 0):.2f}."],
+        "risks": list(score.get("red_flags", []))[:7],
+        "next_actions": ["Confirm scope and payment terms."] if decision == "NEEDS_INFO" else [],
+    }
+
+
+def main(argv=None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI-compatible chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay-ms", type=float, default=200.0, help="Latency of every completion")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency, up to this")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction answered with HTTP 500")
+    parser.add_argument("--garbage-rate", type=float, default=0.0, help="Fraction answered with non-JSON text")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="Delay between streamed 4-character tokens")
+    parser.add_argument("--trailing-tokens", type=int, default=50, help="Commentary tokens streamed after the JSON")
+    args = parser.parse_args(argv)
+
+    app = make_app(args.delay_ms, args.jitter_ms, args.fail_rate, args.garbage_rate, args.token_ms, args.trailing_tokens)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
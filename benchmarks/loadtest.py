@@ -0,0 +1,344 @@
+"""
+Load generator for the FastAPI service, against a real uvicorn with real file I/O.
+
+    python -m benchmarks.loadtest --workers 1,2,4 --concurrency 64 --duration 20 --output loadtest.json
+    python -m benchmarks.loadtest --rate 300 --mix evaluate=0.8,batch=0.2 --env MEMORY_BACKEND=sqlite
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --concurrency 16 --memory-path memory/decisions.jsonl
+
+Without --url, a uvicorn server (`app.main:app`) is started for each --workers
+count with its memory log in a fresh directory plus any --env settings. It is
+warmed up, loaded for --duration seconds and shut down; log growth is measured
+once it has drained its memory queue. With --url the running server is loaded
+as is, and log growth is only reported if --memory-path points at its log.
+
+--concurrency keeps that many requests in flight (closed loop). --rate sends
+that many requests per second whatever the latency (open loop, up to
+--max-inflight), and measures each latency from its scheduled send time, so a
+stalled server is not hidden by the client slowing down. Requests are drawn
+from --distinct synthetic opportunities, single (/evaluate) or in batches
+(/evaluate/batch) according to --mix.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import pydantic_core
+
+from app.segments import SegmentedLog
+
+from .generators import make_opportunities
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = {"evaluate": "/evaluate", "batch": "/evaluate/batch"}
+HEADERS = {"content-type": "application/json"}
+
+# (endpoint, latency seconds, status code or exception name, opportunities)
+Sample = Tuple[str, float, Any, int]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r} in --mix; use {', '.join(ENDPOINTS)}.")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_payloads(distinct: int, batch_size: int, long_risk_rate: float, seed: int) -> Dict[str, List[Tuple[bytes, int]]]:
+    """Pre-encoded request bodies per endpoint, with the number of opportunities in each."""
+    rng = random.Random(seed)
+    opps = make_opportunities(distinct, seed)
+    opps += make_opportunities(int(distinct * long_risk_rate), seed + 1, long_risks=True)
+    rng.shuffle(opps)
+    singles = [(pydantic_core.to_json(o), 1) for o in opps]
+    batches = []
+    for _ in range(max(1, distinct // batch_size)):
+        batch = rng.sample(opps, min(batch_size, len(opps)))
+        batches.append((pydantic_core.to_json(batch), len(batch)))
+    return {"evaluate": singles, "batch": batches}
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))]
+
+
+async def generate(
+    url: str,
+    mix: Dict[str, float],
+    payloads: Dict[str, List[Tuple[bytes, int]]],
+    duration: float,
+    warmup: float,
+    concurrency: int,
+    rate: float,
+    max_inflight: int,
+    timeout: float,
+    seed: int,
+) -> Tuple[List[Sample], int]:
+    """Samples of requests sent after the warm-up, and how many sends were skipped at --max-inflight."""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    samples: List[Sample] = []
+    skipped = 0
+    start = time.perf_counter()
+    measure_from, end = start + warmup, start + warmup + duration
+    limits = httpx.Limits(max_connections=max_inflight if rate > 0 else concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+
+        async def send(scheduled: float) -> None:
+            name = rng.choices(names, weights)[0]
+            body, n = rng.choice(payloads[name])
+            try:
+                resp = await client.post(ENDPOINTS[name], content=body, headers=HEADERS)
+                status: Any = resp.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if scheduled >= measure_from:
+                samples.append((name, time.perf_counter() - scheduled, status, n))
+
+        if rate > 0:
+            inflight = set()
+            for i in range(int((warmup + duration) * rate)):
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if len(inflight) >= max_inflight:
+                    skipped += scheduled >= measure_from
+                    continue
+                task = asyncio.ensure_future(send(scheduled))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+            if inflight:
+                await asyncio.wait(inflight)
+        else:
+            async def loop() -> None:
+                while time.perf_counter() < end:
+                    await send(time.perf_counter())
+
+            await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return samples, skipped
+
+
+def summarize(samples: List[Sample], duration: float) -> Dict[str, Any]:
+    def stats(rows: List[Sample]) -> Dict[str, Any]:
+        ok = sorted(latency for _, latency, status, _ in rows if status == 200)
+        errors: Dict[str, int] = {}
+        for _, _, status, _ in rows:
+            if status != 200:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+        return {
+            "requests": len(rows),
+            "requests_per_s": len(rows) / duration,
+            "opportunities_per_s": sum(n for _, _, status, n in rows if status == 200) / duration,
+            "error_rate": sum(errors.values()) / len(rows) if rows else 0.0,
+            "errors": errors,
+            "latency_ms": {
+                name: (v * 1000 if v is not None else None)
+                for name, v in (
+                    ("p50", percentile(ok, 50)),
+                    ("p95", percentile(ok, 95)),
+                    ("p99", percentile(ok, 99)),
+                    ("max", ok[-1] if ok else None),
+                )
+            },
+        }
+
+    out = stats(samples)
+    out["endpoints"] = {name: stats([s for s in samples if s[0] == name]) for name in sorted({s[0] for s in samples})}
+    return out
+
+
+def log_size(env: Dict[str, str]) -> Tuple[int, int]:
+    """(records, bytes) in the memory backend that `env` points the server at."""
+    if env.get("MEMORY_BACKEND", "jsonl") == "sqlite":
+        path = env.get("MEMORY_DB_PATH", "memory/decisions.db")
+        if not os.path.exists(path):
+            return 0, 0
+        conn = sqlite3.connect(path)
+        try:
+            records = conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+        except sqlite3.OperationalError:
+            records = 0
+        finally:
+            conn.close()
+        size = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+        return records, size
+    log = SegmentedLog(env.get("MEMORY_PATH", "memory/decisions.jsonl"))
+    return sum(1 for _ in log.iter_from()), log.end_offset
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+
+def wait_ready(url: str, proc: Optional[subprocess.Popen], timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if httpx.get(url + "/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server not ready after {timeout:.0f}s")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    # SIGINT runs the lifespan shutdown, which drains the memory queue
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def run(args: argparse.Namespace, workers: Optional[int], payloads, mix, extra_env: Dict[str, str]) -> Dict[str, Any]:
+    env = dict(os.environ)
+    proc = None
+    if args.url:
+        url = args.url.rstrip("/")
+        if args.memory_path and args.memory_path.endswith(".db"):
+            env.update(MEMORY_BACKEND="sqlite", MEMORY_DB_PATH=args.memory_path)
+        elif args.memory_path:
+            env.update(MEMORY_BACKEND="jsonl", MEMORY_PATH=args.memory_path)
+    else:
+        workdir = tempfile.mkdtemp(prefix=f"loadtest-{workers}w-", dir=args.workdir)
+        env.update({
+            "MEMORY_PATH": os.path.join(workdir, "decisions.jsonl"),
+            "MEMORY_DB_PATH": os.path.join(workdir, "decisions.db"),
+            "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        })
+        env.update(extra_env)
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        proc = start_server(workers, port, env)
+
+    measure_log = not args.url or bool(args.memory_path)
+    try:
+        wait_ready(url, proc)
+        before = log_size(env) if measure_log else (0, 0)
+        samples, skipped = asyncio.run(generate(
+            url, mix, payloads, args.duration, args.warmup, args.concurrency, args.rate,
+            args.max_inflight, args.timeout, args.seed,
+        ))
+    finally:
+        if proc is not None:
+            stop_server(proc)
+    if args.url and measure_log:
+        time.sleep(args.settle)  # let the server's memory writer flush
+    after = log_size(env) if measure_log else (0, 0)
+
+    # Log growth spans warm-up + measurement: the warm-up's records are written too
+    window = args.warmup + args.duration
+    result = {
+        "workers": workers,
+        "mode": f"rate={args.rate:g}/s" if args.rate > 0 else f"concurrency={args.concurrency}",
+        "duration_s": args.duration,
+        "skipped_sends": skipped,
+        **summarize(samples, args.duration),
+    }
+    if measure_log:
+        result["log"] = {
+            "records": after[0] - before[0],
+            "bytes": after[1] - before[1],
+            "records_per_s": (after[0] - before[0]) / window,
+            "mb_per_s": (after[1] - before[1]) / window / 1e6,
+        }
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Drive /evaluate and /evaluate/batch on a uvicorn server and report throughput and latency.")
+    parser.add_argument("--url", help="Load this running server instead of starting one per --workers count")
+    parser.add_argument("--memory-path", help="With --url: the server's memory log (.jsonl) or SQLite db (.db), for log growth")
+    parser.add_argument("--workers", default="1", help="uvicorn worker counts to sweep (comma-separated)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight (closed loop)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Requests per second (open loop); overrides --concurrency")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="With --rate: sends past this many in flight are skipped")
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--mix", default="evaluate=0.9,batch=0.1", help="Endpoint weights, e.g. evaluate=0.8,batch=0.2")
+    parser.add_argument("--batch-size", type=int, default=20, help="Opportunities per /evaluate/batch request")
+    parser.add_argument("--distinct", type=int, default=5000, help="Distinct opportunities to draw from (the decision cache sees repeats)")
+    parser.add_argument("--long-risk-rate", type=float, default=0.05, help="Extra share of opportunities with ~2000-character risk text")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request")
+    parser.add_argument("--settle", type=float, default=1.0, help="With --url: seconds to wait before reading the log")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the started servers (repeatable)")
+    parser.add_argument("--workdir", default=None, help="Where started servers keep their memory (default: temp dirs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write all results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+        extra_env = dict(item.split("=", 1) for item in args.env)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    sweep: List[Optional[int]] = [None] if args.url else [int(w) for w in args.workers.split(",") if w.strip()]
+    payloads = make_payloads(args.distinct, max(1, args.batch_size), args.long_risk_rate, args.seed)
+
+    print(f"{'workers':>7} {'req/s':>9} {'opps/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7} {'log rec/s':>10} {'log MB/s':>9}")
+    results = []
+    for workers in sweep:
+        try:
+            r = run(args, workers, payloads, mix, extra_env)
+        except RuntimeError as e:
+            print(f"❌ workers={workers}: {e}")
+            return 1
+        results.append(r)
+        lat = {k: (f"{v:.1f}" if v is not None else "-") for k, v in r["latency_ms"].items()}
+        log = r.get("log")
+        log_records = f"{log['records_per_s']:.0f}" if log else "-"
+        log_mb = f"{log['mb_per_s']:.2f}" if log else "-"
+        print(
+            f"{workers if workers is not None else '-':>7} {r['requests_per_s']:>9.0f} {r['opportunities_per_s']:>9.0f} "
+            f"{lat['p50']:>8} {lat['p95']:>8} {lat['p99']:>8} {lat['max']:>8} {r['error_rate']:>7.1%} "
+            f"{log_records:>10} {log_mb:>9}"
+        )
+        for status, count in sorted(r["errors"].items()):
+            print(f"        {status}: {count}")
+
+    if args.output:
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k != "output"},
+            "runs": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Multi-process stress test for the JSONL memory log.
+
+    python -m benchmarks.stress_append --processes 1,2,4,8 --records 5000
+
+Every process appends its own numbered records (padded past the 4 KiB pipe
+atomicity limit) to one shared log, with rotation enabled so segments are
+sealed under contention. Afterwards every line of every segment and of the
+live file must parse, carry an intact payload, and each writer's sequence
+must be complete and in order. Exits non-zero on any corruption.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from app.memory import now_iso
+from app.segments import SegmentedLog
+from app.storage import JsonlStore
+
+
+def _checksum(pad: str) -> str:
+    return hashlib.sha1(pad.encode("utf-8")).hexdigest()[:12]
+
+
+def writer(path: str, writer_id: int, records: int, batch: int, max_record_bytes: int, rotate_bytes: int, start) -> None:
+    rng = random.Random(writer_id)
+    store = JsonlStore(path, max_bytes=rotate_bytes, block_records=200)
+    start.wait()
+    try:
+        for first in range(0, records, batch):
+            chunk = []
+            for seq in range(first, min(first + batch, records)):
+                pad = chr(ord("a") + writer_id % 26) * rng.randint(1, max_record_bytes)
+                chunk.append({"timestamp": now_iso(), "writer": writer_id, "seq": seq, "pad": pad, "check": _checksum(pad)})
+            store.append_many(chunk)
+    finally:
+        store.close()
+
+
+def read_lines(path: str) -> List[bytes]:
+    """Raw lines of every sealed/pending segment and the live file, in log order."""
+    log = SegmentedLog(path)
+    log.seal_pending()
+    lines: List[bytes] = []
+    for seg in log.segments:
+        seg_path = os.path.join(log.segments_dir, seg["name"])
+        opener = gzip.open if seg["name"].endswith(".gz") else open
+        with opener(seg_path, "rb") as f:
+            lines.extend(f.read().splitlines(keepends=True))
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            lines.extend(f.read().splitlines(keepends=True))
+    return lines
+
+
+def verify(path: str, processes: int, records: int) -> List[str]:
+    problems: List[str] = []
+    last: Dict[int, int] = {}
+    counts: Dict[int, int] = {}
+    for n, raw in enumerate(read_lines(path), start=1):
+        try:
+            rec = json.loads(raw)
+            ok = raw.endswith(b"\n") and _checksum(rec["pad"]) == rec["check"]
+        except (ValueError, KeyError):
+            ok = False
+        if not ok:
+            problems.append(f"line {n}: torn or interleaved ({raw[:60]!r}...)")
+            continue
+        w, seq = rec["writer"], rec["seq"]
+        if seq != last.get(w, -1) + 1:
+            problems.append(f"writer {w}: seq {seq} after {last.get(w, -1)}")
+        last[w] = seq
+        counts[w] = counts.get(w, 0) + 1
+
+    for w in range(processes):
+        if counts.get(w, 0) != records:
+            problems.append(f"writer {w}: {counts.get(w, 0)} of {records} records")
+    if sum(1 for _ in SegmentedLog(path).iter_from()) != processes * records:
+        problems.append("SegmentedLog.iter_from() record count mismatch")
+    return problems
+
+
+def run(processes: int, records: int, batch: int, max_record_bytes: int, rotate_bytes: int, workdir: str) -> Dict[str, float]:
+    path = os.path.join(workdir, f"stress-{processes}", "decisions.jsonl")
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    procs = [
+        ctx.Process(target=writer, args=(path, w, records, batch, max_record_bytes, rotate_bytes, start))
+        for w in range(processes)
+    ]
+    for p in procs:
+        p.start()
+    time.sleep(0.5)  # let every process import before the clock starts
+    t0 = time.perf_counter()
+    start.set()
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    failed = [p.exitcode for p in procs if p.exitcode != 0]
+    problems = verify(path, processes, records)
+    if failed:
+        problems.append(f"{len(failed)} writer process(es) failed")
+    log = SegmentedLog(path)
+    return {
+        "processes": processes,
+        "records": processes * records,
+        "seconds": elapsed,
+        "records_per_s": processes * records / elapsed,
+        "mb_per_s": log.end_offset / elapsed / 1e6,
+        "segments": len(log.segments),
+        "problems": problems,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Hammer the JSONL memory log from many processes and check every line.")
+    parser.add_argument("--processes", default="1,2,4,8", help="Writer process counts to sweep (comma-separated)")
+    parser.add_argument("--records", type=int, default=5000, help="Records per process")
+    parser.add_argument("--batch", type=int, default=16, help="Records per append (one write() each)")
+    parser.add_argument("--record-bytes", type=int, default=16384, help="Max padding per record")
+    parser.add_argument("--rotate-bytes", type=int, default=8 * 1024 * 1024, help="Rotation size (0 = no rotation)")
+    parser.add_argument("--workdir", default=None, help="Where to write the logs (default: a temp dir)")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="stress-append-")
+    print(f"{'procs':>5} {'records':>9} {'seconds':>8} {'records/s':>11} {'MB/s':>8} {'segments':>9}")
+    bad = 0
+    for n in [int(p) for p in args.processes.split(",") if p.strip()]:
+        r = run(n, args.records, args.batch, args.record_bytes, args.rotate_bytes, workdir)
+        print(f"{n:>5} {r['records']:>9} {r['seconds']:>8.2f} {r['records_per_s']:>11.0f} {r['mb_per_s']:>8.1f} {r['segments']:>9}")
+        for problem in r["problems"][:10]:
+            print(f"      ❌ {problem}")
+        bad += len(r["problems"])
+
+    if bad:
+        print(f"\n❌ {bad} problem(s) found in {workdir}")
+        return 1
+    print(f"\n✅ Every line intact and in order (logs in {workdir})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+from app.calibration import METRICS, calibrate, labeled_opportunities, outcome_code
+from app.memory import open_store
+from app.policy import get_policy
+
+def read_labels(path):
+    """{record id: outcome code} from a CSV (with a header) or JSONL file with `id` and `outcome` fields."""
+    with path.open("r", newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return {int(row["id"]): outcome_code(row["outcome"]) for row in rows}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Search scoring policies that best match labeled outcomes of past decisions.")
+    parser.add_argument("--labels", type=Path, required=True, help="CSV/JSONL of `id` (memory record id) and `outcome` (ACCEPT/NEEDS_INFO/REJECT or good/bad)")
+    parser.add_argument("--output", type=Path, required=True, help="Best policy, as a POLICY_PATH JSON file")
+    parser.add_argument("--report", type=Path, help="Write the full JSON report here")
+    parser.add_argument("--candidates", type=int, default=5000, help="Candidate policies to score (the current one included)")
+    parser.add_argument("--spread", type=float, default=0.5, help="How far candidates range from the current policy (0-1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--metric", choices=METRICS, default="macro_f1", help="What 'best' maximizes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = in-process)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.labels.exists():
+        print(f"❌ Not found: {args.labels}")
+        return 1
+    try:
+        labels = read_labels(args.labels)
+    except (KeyError, ValueError) as e:
+        print(f"❌ Invalid labels: {e!r}")
+        return 1
+
+    policy = get_policy()
+    store = open_store()
+    try:
+        opps, outcomes = labeled_opportunities(store, labels)
+    finally:
+        store.close()
+    if not opps:
+        print(f"❌ None of the {len(labels)} labeled ids are in the memory store")
+        return 1
+
+    report = calibrate(
+        opps, outcomes, policy,
+        candidates=args.candidates, spread=args.spread, seed=args.seed, workers=args.workers, metric=args.metric,
+    )
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report["best"]["policy"], indent=2), encoding="utf-8")
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    base, best = report["baseline"], report["best"]
+    print(
+        f"✅ Scored {report['candidates']} policies on {report['records']} labeled records in {report['elapsed_s']:.1f}s "
+        f"({report['candidates_per_s'] or 0} policies/s): {args.metric} {base[args.metric]:.3f} → {best[args.metric]:.3f}"
+    )
+    for label, s in best["per_decision"].items():
+        was = base["per_decision"][label]
+        print(f"   {label}: precision {was['precision']:.2f} → {s['precision']:.2f}, recall {was['recall']:.2f} → {s['recall']:.2f}")
+    print(f"✅ Best policy written to: {args.output} (use it as POLICY_PATH)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
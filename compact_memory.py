@@ -0,0 +1,20 @@
+import argparse
+
+from app.columnar import PART_ROWS, ColumnarHistory, compact
+from app.memory import MEMORY_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the sealed (rotated) segments of the JSONL memory log into columns.")
+    parser.add_argument("--input", default=MEMORY_PATH, help="JSONL memory log")
+    parser.add_argument("--columns-dir", default=None, help="Output directory (default: <input>.columns)")
+    parser.add_argument("--min-rows", type=int, default=1, help="Skip if fewer new records than this")
+    parser.add_argument("--part-rows", type=int, default=PART_ROWS, help="Rows per columnar part (bounds memory use)")
+    args = parser.parse_args()
+
+    n = compact(args.input, args.columns_dir, min_rows=args.min_rows, part_rows=args.part_rows)
+    history = ColumnarHistory(args.input, args.columns_dir)
+    print(f"✅ Compacted {n} new rows ({history.rows} total in {len(history.parts)} parts) to: {history.columns_dir}")
+
+if __name__ == "__main__":
+    main()
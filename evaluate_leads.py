@@ -0,0 +1,187 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pydantic_core
+from pydantic import ValidationError
+
+from app.agent import mock_decisions
+from app.memory import encode_record, open_store
+from app.models import OpportunityInput
+
+OUTPUT_COLUMNS = [
+    "row",
+    "opportunity_title",
+    "client_level",
+    "decision",
+    "confidence",
+    "total_score",
+    "roi",
+    "roi_score",
+    "feasibility_score",
+    "risk_score",
+    "motivation_score",
+    "summary",
+    "error",
+]
+
+def file_format(path, given=None):
+    if given:
+        return given
+    return "csv" if path.suffix.lower() == ".csv" else "jsonl"
+
+def read_chunks(path, fmt, chunk_size):
+    """Yields (first row number, raw rows, csv header or None); rows are not parsed here."""
+    with path.open("r", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            header = next(reader, None)
+            source = reader
+        else:
+            header = None
+            source = (line for line in f if line.strip())
+        chunk, first = [], 1
+        for row in source:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield first, chunk, header
+                first += len(chunk)
+                chunk = []
+        if chunk:
+            yield first, chunk, header
+
+def validation_message(e):
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+def evaluate_chunk(task):
+    """
+    Runs in a worker: validates and scores one chunk, and formats its output
+    there too, so the parent only concatenates bytes in order.
+    Returns (output bytes, rows, errors, memory records).
+    """
+    first, rows, header, out_fmt, log_memory = task
+    inputs, outcomes = [], []
+    for i, raw in enumerate(rows):
+        try:
+            data = dict(zip(header, raw)) if header is not None else json.loads(raw)
+            inputs.append(OpportunityInput.model_validate(data))
+            outcomes.append(None)
+        except ValidationError as e:
+            outcomes.append(validation_message(e))
+        except ValueError as e:
+            outcomes.append(f"invalid JSON: {e}")
+
+    outputs = iter(mock_decisions(inputs))  # one vectorized pass over the valid rows
+    valid = iter(inputs)
+    buf = io.StringIO()
+    writer = csv.writer(buf) if out_fmt == "csv" else None
+    chunks, records, errors = [], [], 0
+    for i, error in enumerate(outcomes):
+        row_no = first + i
+        if error is not None:
+            errors += 1
+            if writer:
+                writer.writerow([row_no] + [""] * (len(OUTPUT_COLUMNS) - 2) + [error])
+            else:
+                chunks.append(json.dumps({"row": row_no, "error": error}, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+            continue
+
+        opp, out = next(valid), next(outputs)
+        out_json = pydantic_core.to_json(out)
+        if log_memory:
+            records.append(encode_record(pydantic_core.to_json(opp), out_json))
+        if writer:
+            s = out.score
+            writer.writerow([
+                row_no, opp.opportunity_title, opp.client_level, out.decision, out.confidence,
+                s.total_score, s.roi, s.roi_score, s.feasibility_score, s.risk_score, s.motivation_score,
+                out.summary, "",
+            ])
+        else:
+            chunks.append(b'{"row":%d,"result":%s}\n' % (row_no, out_json))
+
+    data = buf.getvalue().encode("utf-8") if writer else b"".join(chunks)
+    return data, len(rows), errors, records
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL file of opportunities offline (no API).")
+    parser.add_argument("--input", type=Path, required=True, help="CSV (with a header) or JSONL of OpportunityInput rows")
+    parser.add_argument("--output", type=Path, required=True, help="Results file (.csv or .jsonl)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Rows per work unit")
+    parser.add_argument("--log-memory", action="store_true", help="Also append every decision to the memory store")
+    parser.add_argument("--progress", type=float, default=2.0, help="Seconds between progress lines (0 = quiet)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.input.exists():
+        print(f"❌ Not found: {args.input}")
+        return 1
+
+    in_fmt = file_format(args.input, args.input_format)
+    out_fmt = file_format(args.output, args.output_format)
+    tasks = (
+        (first, rows, header, out_fmt, args.log_memory)
+        for first, rows, header in read_chunks(args.input, in_fmt, max(1, args.chunk_size))
+    )
+
+    store = open_store() if args.log_memory else None
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    total = errors = 0
+    t0 = last_report = time.perf_counter()
+
+    def write(result):
+        nonlocal total, errors, last_report
+        data, n, n_errors, records = result
+        out.write(data)
+        if records:
+            store.append_many(records)
+        total += n
+        errors += n_errors
+        now = time.perf_counter()
+        if args.progress and now - last_report >= args.progress:
+            last_report = now
+            print(f"… {total} rows ({total / (now - t0):.0f} rows/s), {errors} errors", file=sys.stderr, flush=True)
+
+    try:
+        with args.output.open("wb") as out:
+            if out_fmt == "csv":
+                buf = io.StringIO()
+                csv.writer(buf).writerow(OUTPUT_COLUMNS)
+                out.write(buf.getvalue().encode("utf-8"))
+
+            if args.workers <= 1:
+                for task in tasks:
+                    write(evaluate_chunk(task))
+            else:
+                # Bounded window of in-flight chunks: results are written in input
+                # order and the input is never read far ahead of the workers.
+                with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                    pending = deque()
+                    for task in tasks:
+                        pending.append(pool.submit(evaluate_chunk, task))
+                        if len(pending) >= args.workers * 2:
+                            write(pending.popleft().result())
+                    while pending:
+                        write(pending.popleft().result())
+    finally:
+        if store is not None:
+            store.close()
+
+    elapsed = time.perf_counter() - t0
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Scored {total - errors} rows ({errors} errors) in {elapsed:.1f}s ({rate:.0f} rows/s) to: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,74 +1,109 @@
+import argparse
 import json
 import csv
 from pathlib import Path
 
+from app.columnar import COLUMNS, ColumnarHistory
+from app.segments import SegmentedLog
+
 INPUT_PATH = Path("memory/decisions.jsonl")
 OUTPUT_PATH = Path("memory/decisions_export.csv")
 
-def safe_get(d, path, default=""):
-    cur = d
-    for key in path:
-        if not isinstance(cur, dict) or key not in cur:
-            return default
-        cur = cur[key]
-    return cur
-
-def main():
-    if not INPUT_PATH.exists():
-        print(f"❌ Not found: {INPUT_PATH}")
+FIELDNAMES = COLUMNS
+
+def in_range(row, since=None, until=None):
+    ts = row["timestamp"]
+    if since and ts < since:
+        return False
+    if until and ts >= until:
+        return False
+    return True
+
+def export_settings(input_path, fieldnames, since=None, until=None):
+    """What an incremental run must share with the one that wrote the file: rows are appended under its header."""
+    return {"input": str(input_path.resolve()), "columns": list(fieldnames), "since": since, "until": until}
+
+def load_checkpoint(path, settings):
+    try:
+        cp = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
+    # Other log, columns or range → appending would misalign the CSV, start over
+    changed = [k for k, v in settings.items() if cp.get(k) != v]
+    if changed:
+        print(f"ℹ️  {', '.join(changed)} changed since the last run; rewriting the whole file")
+        return 0
+    offset = int(cp.get("offset", 0))
+    # Log was truncated or replaced since the last run → start over
+    return offset if offset <= SegmentedLog(settings["input"]).end_offset else 0
+
+def save_checkpoint(path, settings, offset):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(dict(settings, offset=offset)), encoding="utf-8")
+    tmp.replace(path)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the decision memory log to CSV.")
+    parser.add_argument("--input", type=Path, default=INPUT_PATH, help="JSONL memory log (sealed segments are read too)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH, help="CSV file to write")
+    parser.add_argument("--since", help="Only records at/after this ISO-8601 UTC timestamp")
+    parser.add_argument("--until", help="Only records before this ISO-8601 UTC timestamp")
+    parser.add_argument(
+        "--columns",
+        help=f"Comma-separated subset of columns (default: all). Available: {','.join(FIELDNAMES)}",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append only records added since the last run (uses <output>.checkpoint)",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    input_path, output_path = args.input, args.output
+
+    if not SegmentedLog(str(input_path)).exists:
+        print(f"❌ Not found: {input_path}")
         return
 
-    rows = []
-    with INPUT_PATH.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            r = json.loads(line)
-
-            opp = r.get("opportunity", {})
-            res = r.get("result", {})  # ✅ your file uses "result"
-
-            row = {
-                "timestamp": r.get("timestamp", ""),
-                "opportunity_title": opp.get("opportunity_title", ""),
-                "client_type": opp.get("client_type", ""),
-                "client_level": opp.get("client_level", ""),
-                "expected_time_days": opp.get("expected_time_days", ""),
-                "cost_to_fulfill": opp.get("cost_to_fulfill", ""),
-                "expected_earnings": opp.get("expected_earnings", ""),
-
-                # ✅ FIX: pull from result.*
-                "decision": res.get("decision", ""),
-                "confidence": res.get("confidence", ""),
-                "total_score": safe_get(res, ["score", "total_score"], ""),
-                "summary": res.get("summary", ""),
-            }
-            rows.append(row)
-
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-    fieldnames = [
-        "timestamp",
-        "opportunity_title",
-        "client_type",
-        "client_level",
-        "expected_time_days",
-        "cost_to_fulfill",
-        "expected_earnings",
-        "decision",
-        "confidence",
-        "total_score",
-        "summary",
-    ]
-
-    with OUTPUT_PATH.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"✅ Exported {len(rows)} rows to: {OUTPUT_PATH}")
+    fieldnames = FIELDNAMES
+    if args.columns:
+        fieldnames = [c.strip() for c in args.columns.split(",") if c.strip()]
+        unknown = [c for c in fieldnames if c not in FIELDNAMES]
+        if unknown:
+            print(f"❌ Unknown columns: {', '.join(unknown)}")
+            return
+
+    checkpoint_path = output_path.with_name(output_path.name + ".checkpoint")
+    settings = export_settings(input_path, fieldnames, args.since, args.until)
+    offset = 0
+    if args.incremental and output_path.exists():
+        offset = load_checkpoint(checkpoint_path, settings)
+    append = offset > 0
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Compacted columns (if any) cover the sealed prefix; the log tail covers the rest.
+    # Segments outside --since/--until are skipped via the segment index.
+    history = ColumnarHistory(str(input_path))
+    columns = list(dict.fromkeys(fieldnames + ["timestamp"]))
+
+    count = 0
+    end_offset = offset
+    with output_path.open("a" if append else "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        if not append:
+            writer.writeheader()
+        for end_offset, row in history.iter_rows(columns, offset, args.since, args.until):
+            if in_range(row, args.since, args.until):
+                writer.writerow(row)
+                count += 1
+
+    if args.incremental:
+        save_checkpoint(checkpoint_path, settings, end_offset)
+
+    print(f"✅ Exported {count} rows to: {output_path}" + (" (appended)" if append else ""))
 
 if __name__ == "__main__":
     main()
-
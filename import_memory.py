@@ -0,0 +1,23 @@
+import argparse
+
+from app.memory import MEMORY_DB_PATH, MEMORY_PATH
+from app.storage import SqliteStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the JSONL memory log into the SQLite backend.")
+    parser.add_argument("--source", default=MEMORY_PATH, help="JSONL log to import")
+    parser.add_argument("--db", default=MEMORY_DB_PATH, help="SQLite database to write")
+    args = parser.parse_args()
+
+    store = SqliteStore(args.db)
+    try:
+        n = store.import_jsonl(args.source)
+    finally:
+        store.close()
+
+    # Re-running only picks up records appended since the last import
+    print(f"✅ Imported {n} records from {args.source} into: {args.db}")
+
+if __name__ == "__main__":
+    main()
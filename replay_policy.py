@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from app.memory import MEMORY_BACKEND, open_store
+from app.policy import load_policy_file
+from app.replay import REPLAY_SAMPLES, REPLAY_SPAN_RECORDS, replay
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score the stored decision history under a new policy and report what would flip.")
+    parser.add_argument("--policy", type=Path, required=True, help="Candidate policy: JSON overrides of app/config.py, as for POLICY_PATH")
+    parser.add_argument("--base-policy", type=Path, help="Compare against a re-score under this policy instead of the stored decisions")
+    parser.add_argument("--since", help="Only records at/after this ISO-8601 UTC timestamp")
+    parser.add_argument("--until", help="Only records before this ISO-8601 UTC timestamp")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = in-process)")
+    parser.add_argument("--span-records", type=int, default=REPLAY_SPAN_RECORDS, help="Records per work unit")
+    parser.add_argument("--samples", type=int, default=REPLAY_SAMPLES, help="Sample records kept per flip")
+    parser.add_argument("--output", type=Path, help="Write the full JSON report here")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        policy = load_policy_file(str(args.policy))
+        base_policy = load_policy_file(str(args.base_policy)) if args.base_policy else None
+    except (OSError, ValueError, TypeError) as e:
+        print(f"❌ Invalid policy: {e}")
+        return 1
+
+    store = open_store()
+    try:
+        report = replay(
+            store, policy, base_policy, args.since, args.until,
+            workers=args.workers, span_records=args.span_records, samples=max(0, args.samples),
+        )
+    finally:
+        store.close()
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    n = report["records"]
+    rate = f"{report['flip_rate']:.1%}" if n else "n/a"
+    print(
+        f"✅ Replayed {n} {MEMORY_BACKEND} records ({report['skipped']} skipped) in {report['elapsed_s']:.1f}s "
+        f"({report['records_per_s'] or 0} records/s): {report['flipped']} decisions flip ({rate})"
+    )
+    for pair, count in report["flips"].items():
+        print(f"   {pair}: {count}")
+    for level, s in report["by_client_level"].items():
+        print(f"   client_level={level}: {s['flipped']} of {s['records']} flip")
+    delta = report["score_delta"]
+    if n:
+        print(f"   total_score changes for {delta['changed']} records (mean {delta['mean']:+.2f}, range {delta['min']}..{delta['max']})")
+    if args.output:
+        print(f"✅ Report written to: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
-import json
 import os
 import sys
+from datetime import date, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
-import pandas as pd
+import pydantic_core
 import streamlit as st
 
 # ✅ Make imports work on Streamlit Cloud (project root in PYTHONPATH)
@@ -11,49 +12,44 @@ ROOT_DIR = Path(__file__).resolve().parent.parent  # repo root
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from app.agent import mock_decision
+from app.agent import cached_decision_json
 from app.models import OpportunityInput
-from app.memory import append_memory, build_record
+from app.memory import encode_record, get_stats
+from app.memory_writer import enqueue_memory, get_memory_writer
+from app.segments import SegmentedLog
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from app.history import HistoryLoader
 
 MEMORY_PATH = os.getenv("MEMORY_PATH", "memory/decisions.jsonl")
 
 
-def load_memory_as_dataframe(path: str) -> pd.DataFrame:
-    rows = []
-    if not os.path.exists(path):
-        return pd.DataFrame()
-
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                rec = json.loads(line)
-                opp = rec.get("opportunity", {}) or {}
-
-                # IMPORTANT:
-                # Your memory currently stores decision under "result" (from your screenshot)
-                # but we also support "decision" just in case.
-                dec = rec.get("result") or rec.get("decision") or {}
-
-                rows.append({
-                    "timestamp": rec.get("timestamp", ""),
-                    "opportunity_title": opp.get("opportunity_title", ""),
-                    "client_type": opp.get("client_type", ""),
-                    "client_level": opp.get("client_level", ""),
-                    "expected_time_days": opp.get("expected_time_days", ""),
-                    "cost_to_fulfill": opp.get("cost_to_fulfill", ""),
-                    "expected_earnings": opp.get("expected_earnings", ""),
-                    "decision": dec.get("decision", ""),
-                    "confidence": dec.get("confidence", ""),
-                    "total_score": (dec.get("score", {}) or {}).get("total_score", ""),
-                    "summary": dec.get("summary", ""),
-                })
-            except Exception:
-                continue
-
-    return pd.DataFrame(rows)
+HISTORY_WINDOWS = {"All time": None, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}
+
+
+@st.cache_resource(max_entries=len(HISTORY_WINDOWS))
+def get_history_loader(path: str, since: Optional[str] = None) -> "HistoryLoader":
+    # One loader per log path and window, shared across reruns and sessions.
+    # `since` moves every day, so without a bound each day's loaders (and
+    # their frames) would stay cached for the life of the process; keep as
+    # many as there are windows, least recently used evicted first.
+    # Imported here so pandas/numpy only load once there is history to show.
+    from app.history import HistoryLoader
+
+    return HistoryLoader(path, since=since)
+
+
+def load_memory_as_dataframe(path: str, since: Optional[str] = None) -> Optional["pd.DataFrame"]:
+    if not SegmentedLog(path).exists:
+        return None
+    return get_history_loader(path, since).load()
+
+
+def window_start(days: Optional[int]) -> Optional[str]:
+    # Whole days keep the loader cache key stable within a day
+    return (date.today() - timedelta(days=days)).isoformat() if days else None
 
 
 st.set_page_config(
@@ -138,10 +134,10 @@ with right:
             )
 
             # ✅ Decision locally (no API call)
-            decision_output = mock_decision(opp)
+            decision_output, output_json = cached_decision_json(opp)
 
-            # ✅ Save to memory JSONL
-            append_memory(build_record(opp, decision_output))
+            # ✅ Save to memory JSONL (background writer), reusing the encoded decision
+            enqueue_memory(encode_record(pydantic_core.to_json(opp), output_json))
 
             # ✅ Show result
             st.session_state.last_result = decision_output.model_dump()
@@ -223,22 +219,81 @@ with right:
             st.caption("Raw score object")
             st.json(score)
 
+# Make sure this run's decision is on disk (and counted) before reading history
+get_memory_writer().flush()
+
+st.divider()
+st.subheader("📈 Decision stats")
+
+# Running aggregates: no history is read here, only records newer than the last sync
+stats = get_stats()
+stats.sync()
+summary = stats.snapshot()
+
+if not summary["total"]:
+    st.info("No decisions recorded yet.")
+else:
+    def percent(rate: Optional[float]) -> str:
+        return "—" if rate is None else f"{rate:.0%}"
+
+    s1, s2, s3, s4 = st.columns(4)
+    s1.metric("Decisions", summary["total"])
+    s2.metric("Acceptance rate", percent(summary["acceptance_rate"]))
+    s3.metric("Mean confidence", f"{summary['mean_confidence']:.0f}%")
+    s4.metric("Last 24h / 7d", f"{summary['windows']['24h']['total']} / {summary['windows']['7d']['total']}")
+
+    h1, h2 = st.columns(2)
+    with h1:
+        st.caption("Total score histogram")
+        width = summary["score_histogram"]["bin_width"]
+        counts = summary["score_histogram"]["counts"]
+        # Zero-padded labels keep the bins in order; the last bin includes 100
+        st.bar_chart({
+            f"{i * width:02d}-{100 if i == len(counts) - 1 else i * width + width - 1}": n
+            for i, n in enumerate(counts)
+        })
+    with h2:
+        st.caption("By client level")
+        st.table([
+            {
+                "client level": level,
+                "decisions": c["total"],
+                "accept": c["by_decision"].get("ACCEPT", 0),
+                "reject": c["by_decision"].get("REJECT", 0),
+                "needs info": c["by_decision"].get("NEEDS_INFO", 0),
+                "acceptance": percent(c["acceptance_rate"]),
+            }
+            for level, c in summary["by_client_level"].items()
+        ])
+
 st.divider()
 st.subheader("📤 Export")
 
-df = load_memory_as_dataframe(MEMORY_PATH)
+window = st.selectbox("History window", list(HISTORY_WINDOWS), index=0)
+since = window_start(HISTORY_WINDOWS[window])
 
-if df.empty:
+df = load_memory_as_dataframe(MEMORY_PATH, since)
+
+if df is None or df.empty:
     st.info("No saved decisions yet. Run a few evaluations first, then export.")
 else:
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label="Download decisions as CSV",
-        data=csv_bytes,
-        file_name="decisions_export.csv",
-        mime="text/csv",
-        use_container_width=True,
-    )
+    # Serialize only on request, and reuse the bytes until new rows arrive
+    cached = st.session_state.get("export_csv")
+    if cached and cached[0] != (since, len(df)):
+        cached = st.session_state.export_csv = None
+
+    if cached is None:
+        if st.button("Prepare CSV export", use_container_width=True):
+            cached = st.session_state.export_csv = ((since, len(df)), df.to_csv(index=False).encode("utf-8"))
+
+    if cached is not None:
+        st.download_button(
+            label="Download decisions as CSV",
+            data=cached[1],
+            file_name="decisions_export.csv",
+            mime="text/csv",
+            use_container_width=True,
+        )
     st.caption(f"Exported rows: {len(df)}")
 
 st.caption("Note: Streamlit Cloud storage is not permanent. Use DB/Google Sheets later if you want persistence.")